@@ -0,0 +1,86 @@
+import random
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, GAME_SPEED, WHITE, GREEN, BROWN
+
+# Clouds repeat every SCREEN_WIDTH + 200 pixels and the ground pebbles every 50
+CLOUD_MARGIN = 100
+PEBBLE_SPACING = 50
+PEBBLE_COLOR = (165, 100, 42)
+CLOUD_COLORKEY = (255, 0, 255)
+
+
+class Background:
+    # Clouds and ground pre-rendered once into wrap-around strips, so each
+    # frame only has to blit them at the current scroll offset. Uses its own
+    # seeded Random, leaving the gameplay random stream untouched.
+    def __init__(self, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 ground_height=GROUND_HEIGHT, game_speed=GAME_SPEED):
+        self.SCREEN_WIDTH = screen_width
+        self.SCREEN_HEIGHT = screen_height
+        self.GROUND_HEIGHT = ground_height
+        self.GAME_SPEED = game_speed
+        self.cloud_period = screen_width + 2 * CLOUD_MARGIN
+        self.cloud_strip = self.render_clouds()
+        self.ground_strip = self.render_ground()
+        # Ground without pebbles, rendered the first time it is asked for
+        self.plain_ground_strip = None
+        # Screen areas covered by each layer
+        self.cloud_band = pygame.Rect(0, 0, screen_width, self.cloud_strip.get_height())
+        self.ground_band = pygame.Rect(0, screen_height - ground_height, screen_width, ground_height)
+
+    def render_clouds(self):
+        # Same seeded radii as the old per-frame drawing
+        rng = random.Random(42)
+        # Colorkeyed with RLE rather than per-pixel alpha: the circles are
+        # solid, and RLE blits skip the empty sky almost for free
+        strip = pygame.Surface((self.cloud_period, 210))
+        strip.fill(CLOUD_COLORKEY)
+        strip.set_colorkey(CLOUD_COLORKEY, pygame.RLEACCEL)
+        for i in range(5):
+            cloud_x = i * 100
+            cloud_y = 50 + i * 30
+            for j in range(3):
+                radius = rng.randint(20, 30)
+                # Draw the wrapped copy as well so clouds scroll seamlessly
+                for wrap in (-self.cloud_period, 0, self.cloud_period):
+                    pygame.draw.circle(strip, WHITE, (cloud_x + j * 15 + wrap, cloud_y), radius)
+        return strip
+
+    def render_ground(self, pebbles=True):
+        # Ground, grass and pebbles, one pebble spacing wider than the screen
+        # so a single blit covers every scroll offset
+        rng = random.Random(42)
+        ground_y_positions = [
+            rng.randint(self.SCREEN_HEIGHT - self.GROUND_HEIGHT + 20, self.SCREEN_HEIGHT - 10)
+            for _ in range(16)
+        ]
+        strip = pygame.Surface((self.SCREEN_WIDTH + PEBBLE_SPACING, self.GROUND_HEIGHT))
+        strip.fill(BROWN)
+        pygame.draw.rect(strip, GREEN, (0, 0, strip.get_width(), 10))
+        count = self.SCREEN_WIDTH // PEBBLE_SPACING
+        for i in range(count + 1 if pebbles else 0):
+            y = ground_y_positions[i % count] - (self.SCREEN_HEIGHT - self.GROUND_HEIGHT)
+            pygame.draw.circle(strip, PEBBLE_COLOR, (i * PEBBLE_SPACING, y), 5)
+        if pygame.display.get_surface() is not None:
+            strip = strip.convert()
+        return strip
+
+    def cloud_offset(self, ticks):
+        return (ticks // 100) % self.cloud_period - CLOUD_MARGIN
+
+    def ground_offset(self, ticks):
+        return (ticks * self.GAME_SPEED // 50) % PEBBLE_SPACING
+
+    def draw_clouds(self, screen, ticks):
+        offset = self.cloud_offset(ticks)
+        screen.blit(self.cloud_strip, (offset, 0))
+        screen.blit(self.cloud_strip, (offset - self.cloud_period, 0))
+        return self.cloud_band
+
+    def draw_ground(self, screen, ticks, pebbles=True):
+        strip = self.ground_strip
+        if not pebbles:
+            if self.plain_ground_strip is None:
+                self.plain_ground_strip = self.render_ground(pebbles=False)
+            strip = self.plain_ground_strip
+        return screen.blit(strip, (-self.ground_offset(ticks), self.SCREEN_HEIGHT - self.GROUND_HEIGHT))
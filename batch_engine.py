@@ -0,0 +1,360 @@
+import math
+import numpy as np
+from settings import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, SIM_RATE, PHYSICS_RATE, GRAVITY, FLAP_STRENGTH, GAME_SPEED,
+    PIPE_FREQUENCY, PIPE_GAP_START, PIPE_GAP_MIN, GROUND_HEIGHT,
+    FOOD_FREQUENCY_START, FOOD_FREQUENCY_MIN
+)
+
+# Bird constants, mirroring the defaults set in Bird.__init__
+BIRD_X = SCREEN_WIDTH // 4
+TOP_BUFFER = -30
+BASE_COLLISION_SIZE = 30
+MAX_SIZE_FACTOR = 2.0
+SIZE_INCREASE = 0.1
+BOUNCE_DURATION = 200
+BOUNCE_STRENGTH = -8
+MAX_BOUNCES = 5
+
+# Food constants, mirroring Food
+FOOD_SIZE = 20
+FOOD_SPEED_FACTOR = 1.5
+FOOD_TYPES = ("seed", "worm", "berry")
+
+
+class BatchEngine:
+    # Runs n independent copies of engine.Engine at once. All per-bird state
+    # lives in arrays of shape (n,) and all pipes/food in (n, slots) tables,
+    # so one step() advances every game with a fixed number of numpy calls.
+    def __init__(self, n, seed=None, fps=SIM_RATE, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 ground_height=GROUND_HEIGHT, game_speed=GAME_SPEED):
+        self.n = n
+        self.fps = fps
+        self.SCREEN_WIDTH = screen_width
+        self.SCREEN_HEIGHT = screen_height
+        self.GROUND_HEIGHT = ground_height
+        self.GAME_SPEED = game_speed
+        # Per-step physics scaled to the simulation rate exactly like Engine
+        self.dt = dt = PHYSICS_RATE / fps
+        self.step_speed = game_speed * dt
+        self.gravity = GRAVITY * dt * dt
+        self.flap_strength = FLAP_STRENGTH * dt
+        self.bounce_strength = BOUNCE_STRENGTH * dt
+        self.wing_updates = max(1, round(11 / dt))
+        self.pipe_width = screen_width // 10
+        self.food_speed = self.step_speed * FOOD_SPEED_FACTOR
+        # Pipes stay on whole pixels at integer speeds and need no truncation
+        self._whole_speed = float(self.step_speed).is_integer()
+        self.rng = np.random.default_rng(seed)
+
+        # Enough ring-buffer slots for every pipe/food that can be on screen at once
+        frame_ms = 1000 / fps
+        pipe_lifetime = (screen_width + self.pipe_width) / self.step_speed
+        self.pipe_slots = math.ceil(pipe_lifetime / (PIPE_FREQUENCY / frame_ms)) + 1
+        food_lifetime = (screen_width + FOOD_SIZE) / self.food_speed
+        self.food_slots = math.ceil(food_lifetime / (FOOD_FREQUENCY_MIN / frame_ms)) + 1
+
+        # Bird state
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n)
+        self.vel_y = np.zeros(n)
+        self.size_factor = np.zeros(n)
+        self.collision_size = np.zeros(n)
+        self.collision_half = np.zeros(n)
+        self.is_bouncing = np.zeros(n, dtype=bool)
+        self.bounce_time = np.zeros(n, dtype=np.int64)
+        self.bounce_count = np.zeros(n, dtype=np.int64)
+        self.is_collided = np.zeros(n, dtype=bool)
+        self.food_eaten = np.zeros(n, dtype=np.int64)
+
+        # Game state
+        self.game_over = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.food_count = np.zeros(n, dtype=np.int64)
+        self.total_pipes = np.zeros(n, dtype=np.int64)
+        self.total_foods = np.zeros(n, dtype=np.int64)
+        self.last_pipe_time = np.zeros(n, dtype=np.int64)
+        self.last_food_time = np.zeros(n, dtype=np.int64)
+        self.food_frequency = np.zeros(n, dtype=np.int64)
+
+        # Pipe table - slot = spawn number % pipe_slots, seq keeps spawn order.
+        # Tables are (slots, n) so per-game arrays broadcast along the fast axis.
+        shape = (self.pipe_slots, n)
+        self.pipe_active = np.zeros(shape, dtype=bool)
+        self.pipe_seq = np.zeros(shape, dtype=np.int64)
+        self.pipe_x = np.zeros(shape)
+        self.pipe_height = np.zeros(shape)
+        self.pipe_bottom = np.zeros(shape)
+        self.pipe_passed = np.zeros(shape, dtype=bool)
+        self.pipe_top_end = np.zeros(shape)
+        self.pipe_bottom_start = np.zeros(shape)
+        self.pipe_bottom_end = np.zeros(shape)
+
+        # Food table
+        shape = (self.food_slots, n)
+        self.food_active = np.zeros(shape, dtype=bool)
+        self.food_seq = np.zeros(shape, dtype=np.int64)
+        self.food_x = np.zeros(shape)
+        self.food_y = np.zeros(shape)
+        self.food_type = np.zeros(shape, dtype=np.int8)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        # Restart the selected games (all of them when mask is None)
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.frame[mask] = 0
+        self.y[mask] = self.SCREEN_HEIGHT // 2
+        self.vel_y[mask] = 0
+        self.size_factor[mask] = 1.0
+        self.collision_size[mask] = BASE_COLLISION_SIZE
+        self.collision_half[mask] = BASE_COLLISION_SIZE // 2
+        self.is_bouncing[mask] = False
+        self.bounce_time[mask] = 0
+        self.bounce_count[mask] = 0
+        self.is_collided[mask] = False
+        self.food_eaten[mask] = 0
+
+        self.game_over[mask] = False
+        self.score[mask] = 0
+        self.food_count[mask] = 0
+        self.total_pipes[mask] = 0
+        self.total_foods[mask] = 0
+        self.last_pipe_time[mask] = 0
+        self.last_food_time[mask] = 0
+        self.food_frequency[mask] = FOOD_FREQUENCY_START
+
+        self.pipe_active[:, mask] = False
+        self.pipe_passed[:, mask] = False
+        self.food_active[:, mask] = False
+
+    def ticks(self):
+        # Per-game simulated milliseconds, see engine.FrameClock
+        return self.frame * 1000 // self.fps
+
+    def wing_up(self):
+        # The wing flips every wing_updates updates from the start of a game,
+        # so it follows from the frame count instead of being stepped
+        return (self.frame // self.wing_updates) % 2 == 1
+
+    def bird_rects(self):
+        # Left, top, width, height of every bird's collision rect, truncated
+        # to integers the same way pygame.Rect does
+        half = self.collision_half
+        left = BIRD_X - half
+        top = np.trunc(self.y - half)
+        return left, top, self.collision_size, self.collision_size
+
+    def _gap_centers(self, numbers):
+        # Gap centers for newly spawned pipes. numbers holds each game's spawn
+        # number for the pipe (1 for its first pipe); independent games ignore
+        # it, a shared course (see evolve.CourseBatchEngine) looks it up.
+        usable_height = self.SCREEN_HEIGHT - self.GROUND_HEIGHT
+        return self.rng.integers(int(usable_height * 0.2), int(usable_height * 0.8), endpoint=True,
+                                 size=len(numbers))
+
+    def _food_draws(self, numbers):
+        # Heights and type indices for newly spawned food, like _gap_centers
+        k = len(numbers)
+        heights = self.rng.integers(50, self.SCREEN_HEIGHT - self.GROUND_HEIGHT - 50, endpoint=True, size=k)
+        types = self.rng.integers(0, len(FOOD_TYPES), size=k)
+        return heights, types
+
+    def _spawn_pipes(self, games):
+        # Vectorized Pipe.__init__ + Pipe.set_height for the given game indices
+        self.total_pipes[games] += 1
+        total = self.total_pipes[games]
+        progress = np.minimum(1.0, total / 50)
+        gap = PIPE_GAP_START - (PIPE_GAP_START - PIPE_GAP_MIN) * progress
+        half_gap = gap // 2
+
+        gap_center = self._gap_centers(total)
+        height = gap_center - half_gap
+        bottom = gap_center + half_gap
+
+        # Safety checks to keep pipes inside the usable screen area
+        ground = self.SCREEN_HEIGHT - self.GROUND_HEIGHT
+        shift = np.maximum(bottom - ground, 0)
+        bottom -= shift
+        height -= shift
+        shift = np.maximum(-height, 0)
+        height += shift
+        bottom += shift
+
+        slots = total % self.pipe_slots
+        self.pipe_active[slots, games] = True
+        self.pipe_seq[slots, games] = total
+        self.pipe_x[slots, games] = self.SCREEN_WIDTH
+        self.pipe_height[slots, games] = height
+        self.pipe_bottom[slots, games] = bottom
+        self.pipe_passed[slots, games] = False
+
+        # Collision rects in pygame.Rect integer form. A pipe part with zero
+        # height can never collide, which an end of -inf encodes.
+        top_end = np.trunc(height)
+        self.pipe_top_end[slots, games] = np.where(top_end > 0, top_end, -np.inf)
+        bottom_start = np.trunc(bottom)
+        bottom_height = np.trunc(ground - bottom)
+        self.pipe_bottom_start[slots, games] = bottom_start
+        self.pipe_bottom_end[slots, games] = np.where(bottom_height > 0, bottom_start + bottom_height, -np.inf)
+
+    def _spawn_foods(self, games):
+        self.total_foods[games] += 1
+        slots = self.total_foods[games] % self.food_slots
+        heights, types = self._food_draws(self.total_foods[games])
+        self.food_active[slots, games] = True
+        self.food_seq[slots, games] = self.total_foods[games]
+        self.food_x[slots, games] = self.SCREEN_WIDTH
+        self.food_y[slots, games] = heights
+        self.food_type[slots, games] = types
+
+    def _pipe_hits(self, mask):
+        # Pipe.collide for every (slot, game) pair. The x-span test runs
+        # first and usually rules out every pipe, skipping the y tests.
+        left, top, size, _ = self.bird_rects()
+        pipe_left = self.pipe_x if self._whole_speed else np.trunc(self.pipe_x)
+        hits = mask & (pipe_left < left + size) & (pipe_left > left - self.pipe_width)
+        if not hits.any():
+            return hits
+        bottom = top + size
+        hits &= (((top < self.pipe_top_end) & (bottom > 0))
+                 | ((top < self.pipe_bottom_end) & (bottom > self.pipe_bottom_start)))
+        return hits
+
+    def _food_hits(self, mask):
+        # Food.collide for every (slot, game) pair
+        left, top, size, _ = self.bird_rects()
+        food_left = np.trunc(self.food_x)
+        hits = mask & (food_left < left + size) & (food_left > left - FOOD_SIZE)
+        if not hits.any():
+            return hits
+        food_top = np.trunc(self.food_y)
+        hits &= (food_top < top + size) & (food_top > top - FOOD_SIZE)
+        return hits
+
+    def _eat(self, games):
+        # Bird.eat_food for one food item per listed game
+        self.food_eaten[games] += 1
+        self.food_count[games] += 1
+        size = self.size_factor[games]
+        grow = size < MAX_SIZE_FACTOR
+        size = np.where(grow, np.minimum(size + SIZE_INCREASE, MAX_SIZE_FACTOR), size)
+        self.size_factor[games] = size
+        self.collision_size[games] = np.trunc(BASE_COLLISION_SIZE * size)
+        self.collision_half[games] = self.collision_size[games] // 2
+
+    def step(self, actions):
+        # actions is a boolean array of shape (n,), True to flap.
+        # Returns the game_over array.
+        self.frame += 1
+        live = ~self.game_over
+        current_time = self.ticks()
+
+        # Bird.flap - no flapping once collided, heavier birds flap weaker
+        flap = np.asarray(actions, dtype=bool) & live & ~self.is_collided
+        np.copyto(self.vel_y, self.flap_strength / self.size_factor, where=flap)
+
+        # Add new pipes
+        spawn = live & (current_time - self.last_pipe_time > PIPE_FREQUENCY)
+        if spawn.any():
+            games = np.flatnonzero(spawn)
+            self._spawn_pipes(games)
+            self.last_pipe_time[games] = current_time[games]
+
+        # Add new food items
+        spawn = live & (current_time - self.last_food_time > self.food_frequency)
+        if spawn.any():
+            games = np.flatnonzero(spawn)
+            self._spawn_foods(games)
+            self.last_food_time[games] = current_time[games]
+            self.food_frequency[games] = np.maximum(
+                FOOD_FREQUENCY_MIN, FOOD_FREQUENCY_START - self.score[games] * 50)
+
+        # Update pipes of running games. Free slots move along too, which is
+        # harmless and cheaper than masking them out.
+        moving = self.pipe_active & live
+        self.pipe_x -= live * self.step_speed
+        self.pipe_active &= self.pipe_x > -self.pipe_width
+
+        # The windowed loop stops moving pipes after the first collision in a
+        # frame, so pipes spawned after the colliding one get their move undone
+        hits = self._pipe_hits(moving & self.pipe_active)
+        collided = hits.any(axis=0)
+        any_collided = collided.any()
+        if any_collided:
+            first = np.where(hits, self.pipe_seq, np.iinfo(np.int64).max).min(axis=0)
+            later = self.pipe_active & collided & (self.pipe_seq > first)
+            np.add(self.pipe_x, self.step_speed, out=self.pipe_x, where=later)
+            self.game_over |= collided
+            self.is_collided |= collided
+
+        # Score pipes passed before any collision in this frame
+        passing = moving & self.pipe_active & ~self.pipe_passed & (self.pipe_x < BIRD_X - 20)
+        if passing.any():
+            if any_collided:
+                passing &= ~collided | (self.pipe_seq < first)
+            self.pipe_passed |= passing
+            self.score += passing.sum(axis=0)
+
+        # Update food of games still running
+        live = ~self.game_over
+        moving = self.food_active & live
+        self.food_x -= live * self.food_speed
+        self.food_active &= self.food_x > -FOOD_SIZE
+
+        eaten = self._food_hits(moving & self.food_active)
+        if eaten.any():
+            self._eat_in_order(np.flatnonzero(eaten.any(axis=0)))
+
+        self._update_birds(current_time)
+        return self.game_over
+
+    def _eat_in_order(self, games):
+        # Only the few games touching food this frame get here. Each eaten item
+        # grows the collision box, which can reach the next item in spawn order,
+        # so walk the food of these games one spawn rank at a time.
+        seq = np.where(self.food_active[:, games], self.food_seq[:, games], np.iinfo(np.int64).max)
+        order = np.argsort(seq, axis=0)
+        for rank in range(self.food_slots):
+            slots = order[rank]
+            left, top, size, _ = self.bird_rects()
+            left, top, size = left[games], top[games], size[games]
+            food_left = np.trunc(self.food_x[slots, games])
+            food_top = np.trunc(self.food_y[slots, games])
+            hit = (self.food_active[slots, games]
+                   & (left < food_left + FOOD_SIZE) & (left + size > food_left)
+                   & (top < food_top + FOOD_SIZE) & (top + size > food_top))
+            if hit.any():
+                self.food_active[slots[hit], games[hit]] = False
+                self._eat(games[hit])
+
+    def _update_birds(self, current_time):
+        # Vectorized Bird.update
+        self.vel_y += self.gravity * self.size_factor
+        self.y += self.vel_y
+
+        # Bird hits ground
+        ground = self.SCREEN_HEIGHT - self.GROUND_HEIGHT
+        on_ground = self.y >= ground
+        if on_ground.any():
+            np.copyto(self.y, ground, where=on_ground)
+
+            # Start a new bounce, or keep bouncing if already moving down
+            start = on_ground & ~self.is_bouncing
+            rebound = on_ground & self.is_bouncing & (self.vel_y > 0)
+            self.is_bouncing |= start
+            np.copyto(self.bounce_time, current_time, where=start)
+            np.copyto(self.vel_y, self.bounce_strength, where=start | rebound)
+            self.bounce_count += start
+            np.copyto(self.bounce_count, 0, where=self.bounce_count >= MAX_BOUNCES)
+
+        # Check if bounce has ended
+        if self.is_bouncing.any():
+            self.is_bouncing &= current_time - self.bounce_time <= BOUNCE_DURATION
+
+        # Stop at the top buffer
+        at_top = self.y <= TOP_BUFFER
+        if at_top.any():
+            np.copyto(self.y, TOP_BUFFER, where=at_top)
+            np.copyto(self.vel_y, 0, where=at_top)
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# Benchmarks always run headless
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+from engine import Engine
+from background import Background
+from hud import Hud
+from fonts import load_font
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, SKY_BLUE
+
+# Fixed seeds so every run simulates and draws the same games
+SEEDS = (1, 2, 3, 4, 5)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.15  # Fractional slowdown that counts as a regression
+
+# Run in a fresh interpreter: import main, open the window, report timings
+STARTUP_SCRIPT = (
+    'import time; start = time.perf_counter(); import main; imported = time.perf_counter(); '
+    'main.bootstrap(); print(imported - start, main.startup_times["font"])'
+)
+
+
+def scripted_flap(engine):
+    # Scripted input: flap whenever the bird drops below a target height that
+    # sweeps up and down, so games last long enough to see pipes and food
+    target = 300 + (engine.frame // 90 % 5 - 2) * 25
+    return engine.bird.y > target
+
+
+def measure(fn, number, repeat=5):
+    # Best time per call over several repeats, in seconds
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def play(engine, seed, frames):
+    # Scripted game from seed for up to frames steps
+    engine.reset(seed=seed)
+    while engine.frame < frames and not engine.step(scripted_flap(engine)):
+        pass
+    return engine
+
+
+def bench_simulation(scale):
+    # One pass plays every seed to game over; the fastest pass is reported
+    engine = Engine()
+
+    def run():
+        for seed in SEEDS:
+            play(engine, seed, 5000)
+
+    steps = 0
+    for seed in SEEDS:
+        steps += play(engine, seed, 5000).frame
+    return {'sim_steps_per_s': (steps / measure(run, 1, 5 * scale), 'steps/s', True)}
+
+
+def bench_restart(scale):
+    engine = Engine()
+    play(engine, SEEDS[0], 2000)
+    seconds = measure(lambda: engine.reset(seed=SEEDS[0]), 2000 * scale)
+    return {'restart_us': (seconds * 1e6, 'us', False)}
+
+
+def bench_collision(scale):
+    # Narrow-phase tests against pipes and food, with the bird swept through
+    # a range of heights so hits and misses are both exercised
+    engine = play(Engine(), SEEDS[0], 600)
+    bird = engine.bird
+    pipes = list(engine.pipes)
+    foods = list(engine.foods)
+    heights = range(0, SCREEN_HEIGHT, 7)
+    results = {}
+    for name, entities in (('pipe_collide_per_s', pipes), ('food_collide_per_s', foods)):
+        if not entities:
+            continue
+        bird.x = int(entities[0].x)
+
+        def run():
+            for bird.y in heights:
+                for entity in entities:
+                    entity.collide(bird)
+
+        checks = len(heights) * len(entities)
+        results[name] = (checks / measure(run, 20 * scale), 'checks/s', True)
+    return results
+
+
+def bench_draw(screen, scale):
+    # Time per call of every draw routine on a mid-game frame
+    engine = Engine(screen=screen)
+    play(engine, SEEDS[0], 600)
+    background = Background()
+    hud = Hud(load_font('Arial', 32))
+    bird = engine.bird
+    pipe = engine.pipes[0]
+    foods = {}
+    for seed in SEEDS:
+        for food in play(engine, seed, 700).foods:
+            foods.setdefault(food.food_type, food)
+    number = 2000 * scale
+    screen.fill(SKY_BLUE)
+
+    results = {
+        'draw_bird_ms': measure(bird.draw, number),
+        'draw_pipe_ms': measure(lambda: pipe.draw(screen), number),
+        'draw_clouds_ms': measure(lambda: background.draw_clouds(screen, 12345), number),
+        'draw_ground_ms': measure(lambda: background.draw_ground(screen, 12345), number),
+        'draw_hud_ms': measure(lambda: hud.draw_stats(screen, engine.score, engine.food_count,
+                                                      bird.size_factor), number),
+    }
+    for food_type, food in sorted(foods.items()):
+        results['draw_food_%s_ms' % food_type] = measure(lambda: food.draw(screen), number)
+    return {name: (seconds * 1000, 'ms', False) for name, seconds in results.items()}
+
+
+def start_process(env):
+    # (wall seconds, import seconds, font seconds) of one STARTUP_SCRIPT process
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], env=env, capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - start
+    imported, font = map(float, result.stdout.split()[-2:])
+    return wall, imported, font
+
+
+def bench_startup(scale):
+    # Whole-process start of the game up to an open window. Cold starts have
+    # an empty font cache, warm starts reuse the one the cold start wrote.
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, FLAPPY_CACHE_DIR=cache_dir)
+        cold = []
+        warm = []
+        for _ in range(3 * scale):
+            cache = os.path.join(cache_dir, 'fonts.json')
+            if os.path.exists(cache):
+                os.remove(cache)
+            cold.append(start_process(env))
+            warm.append(start_process(env))
+    return {
+        'startup_cold_ms': (min(run[0] for run in cold) * 1000, 'ms', False),
+        'startup_warm_ms': (min(run[0] for run in warm) * 1000, 'ms', False),
+        'import_main_ms': (min(run[1] for run in warm) * 1000, 'ms', False),
+        'font_cold_ms': (min(run[2] for run in cold) * 1000, 'ms', False),
+        'font_warm_ms': (min(run[2] for run in warm) * 1000, 'ms', False),
+    }
+
+
+def run(scale=1):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    metrics = {}
+    for bench in (bench_startup, bench_simulation, bench_restart, bench_collision):
+        metrics.update(bench(scale))
+    metrics.update(bench_draw(screen, scale))
+    pygame.quit()
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'metrics': {
+            name: {'value': value, 'unit': unit, 'higher_is_better': higher}
+            for name, (value, unit, higher) in sorted(metrics.items())
+        },
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # Returns (name, baseline, current, change) for every metric that got
+    # worse by more than threshold. change is the fractional slowdown.
+    regressions = []
+    for name, current in results['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None or not base['value']:
+            continue
+        if current['higher_is_better']:
+            change = base['value'] / current['value'] - 1 if current['value'] else float('inf')
+        else:
+            change = current['value'] / base['value'] - 1
+        if change > threshold:
+            regressions.append((name, base['value'], current['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flappy Bird simulation and rendering benchmarks')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fractional slowdown reported as a regression (default %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--scale', type=int, default=1, help='multiply the amount of work per benchmark')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale)
+    for name, metric in results['metrics'].items():
+        print('%-24s %14.4f %s' % (name, metric['value'], metric['unit']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Saved baseline to %s' % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at %s, run with --save-baseline to create one' % args.baseline)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, change in regressions:
+        print('REGRESSION %s: %.4f -> %.4f (%+.0f%%)' % (name, base, current, change * 100))
+    if not regressions:
+        print('No regressions beyond %.0f%% against %s' % (args.threshold * 100, args.baseline))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
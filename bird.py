@@ -9,18 +9,47 @@ BLACK = (0, 0, 0)
 
 
 class Bird:
-    def __init__(self, screen, screen_width, screen_height, gravity, flap_strength, ground_height):
+    def __init__(self, screen, screen_width, screen_height, gravity, flap_strength, ground_height, get_ticks=None,
+                 dt=1):
         # Store references to game parameters
         self.screen = screen
+        # Millisecond clock used for bounce timing - the wall clock unless
+        # a simulation clock is supplied (see engine.FrameClock)
+        self.get_ticks = get_ticks or pygame.time.get_ticks
         self.SCREEN_WIDTH = screen_width
         self.SCREEN_HEIGHT = screen_height
         self.GRAVITY = gravity
         self.FLAP_STRENGTH = flap_strength
         self.GROUND_HEIGHT = ground_height
+        # Length of one update in 60 Hz frames. gravity and flap_strength are
+        # given per update; the built-in bounce and wing timings scale by dt.
+        self.dt = dt
 
+        # How high the bird can go before being stopped
+        self.top_buffer = -30
+
+        # Bird size factor limits - size increases when eating food
+        self.max_size_factor = 2.0
+        self.size_increase = 0.1
+
+        # Bounce effect parameters
+        self.bounce_duration = 200  # milliseconds
+        self.bounce_strength = -8 * dt  # Initial upward velocity when bouncing
+        self.max_bounces = 5  # Maximum number of bounces before game over
+
+        # Updates between wing flaps - every 11 frames at 60 Hz
+        self.wing_updates = max(1, round(11 / dt))
+
+        # Rendered bird images, see BirdSpriteCache
+        self.sprites = BirdSpriteCache()
+
+        self.reset()
+
+    def reset(self):
+        # Put the bird back in its starting state, keeping the sprite cache
         # Bird position and physics
-        self.x = screen_width // 4
-        self.y = screen_height // 2
+        self.x = self.SCREEN_WIDTH // 4
+        self.y = self.SCREEN_HEIGHT // 2
         self.vel_y = 0
 
         # Animation state
@@ -30,33 +59,36 @@ class Bird:
         # Game state
         self.alive = True
 
-        # How high the bird can go before being stopped
-        self.top_buffer = -30
-
         # Bird collision box dimensions - starts relatively small
         self.collision_width = 30
         self.collision_height = 30
 
         # Bird size factor - increases when eating food
         self.size_factor = 1.0
-        self.max_size_factor = 2.0
 
         # Food eaten counter
         self.food_eaten = 0
-        self.size_increase = 0.1
 
         # Bounce effect variables
         self.is_bouncing = False
         self.bounce_time = 0
-        self.bounce_duration = 200  # milliseconds
-        self.bounce_strength = -8  # Initial upward velocity when bouncing
         self.bounce_count = 0
-        self.max_bounces = 5  # Maximum number of bounces before game over
 
         # Collision state
         self.is_collided = False
         self.collision_time = 0
 
+    def snapshot(self):
+        # Everything reset() initialises, as a flat tuple for Engine.snapshot
+        return (self.x, self.y, self.vel_y, self.wing_up, self.wing_counter, self.alive, self.collision_width,
+                self.collision_height, self.size_factor, self.food_eaten, self.is_bouncing, self.bounce_time,
+                self.bounce_count, self.is_collided, self.collision_time)
+
+    def restore(self, state):
+        (self.x, self.y, self.vel_y, self.wing_up, self.wing_counter, self.alive, self.collision_width,
+         self.collision_height, self.size_factor, self.food_eaten, self.is_bouncing, self.bounce_time,
+         self.bounce_count, self.is_collided, self.collision_time) = state
+
     def update(self):
         # Apply gravity - heavier birds fall faster
         # Allow falling even when collided
@@ -65,7 +97,7 @@ class Bird:
 
         # Wing animation
         self.wing_counter += 1
-        if self.wing_counter > 10:
+        if self.wing_counter >= self.wing_updates:
             self.wing_up = not self.wing_up
             self.wing_counter = 0
 
@@ -78,7 +110,7 @@ class Bird:
             if not self.is_bouncing:
                 # Start a new bounce
                 self.is_bouncing = True
-                self.bounce_time = pygame.time.get_ticks()
+                self.bounce_time = self.get_ticks()
                 self.vel_y = self.bounce_strength  # Bounce up
                 self.bounce_count += 1
 
@@ -90,7 +122,7 @@ class Bird:
                 self.vel_y = self.bounce_strength  # Reset the bounce
 
         # Check if bounce has ended
-        if self.is_bouncing and pygame.time.get_ticks() - self.bounce_time > self.bounce_duration:
+        if self.is_bouncing and self.get_ticks() - self.bounce_time > self.bounce_duration:
             self.is_bouncing = False
 
         # Allow the bird to go slightly above screen but stop velocity
@@ -122,7 +154,7 @@ class Bird:
 
     def set_collision(self):
         self.is_collided = True
-        self.collision_time = pygame.time.get_ticks()
+        self.collision_time = self.get_ticks()
 
     def get_collision_rect(self):
         # Simple collision box - pipe collision logic handles buffer zone
@@ -133,136 +165,202 @@ class Bird:
             self.collision_height
         )
 
-    def draw(self):
-        # Skip drawing if bird is completely above screen
-        if self.y + 15 * self.size_factor < 0:
-            return
+    def collision_bounds(self):
+        # Left, top, right, bottom of get_collision_rect() without building the Rect
+        left = int(self.x - self.collision_width // 2)
+        top = int(self.y - self.collision_height // 2)
+        return left, top, left + self.collision_width, top + self.collision_height
 
-        # Create a more detailed bird with sprite-like drawing
-        # Calculate scaled dimensions based on size factor
-        width = int(40 * self.size_factor)
-        height = int(30 * self.size_factor)
-
-        # Bird body
-        pygame.draw.ellipse(self.screen, YELLOW, (
-            self.x - width // 2,
-            self.y - height // 2,
-            width,
-            height
-        ))
+    def draw(self, y=None, detail=True):
+        # y overrides the bird's height, e.g. when rendering between updates.
+        # detail=False leaves out the shading and the wing and tail strokes.
+        if y is None:
+            y = self.y
 
-        # Add shading to body for more dimension
-        pygame.draw.ellipse(self.screen, (240, 210, 0), (
-            self.x - int(15 * self.size_factor),
-            self.y - int(12 * self.size_factor),
-            int(30 * self.size_factor),
-            int(20 * self.size_factor)
-        ))
+        # Skip drawing if bird is completely above screen
+        if y + 15 * self.size_factor < 0:
+            return
 
-        # Bird belly
-        pygame.draw.ellipse(self.screen, WHITE, (
-            self.x - int(10 * self.size_factor),
-            self.y - int(5 * self.size_factor),
-            int(25 * self.size_factor),
-            int(15 * self.size_factor)
-        ))
+        # Legs only show during the first part of the bounce animation
+        legs_visible = self.is_bouncing and self.get_ticks() - self.bounce_time < 150
+        sprite, offset_x, offset_y = self.sprites.get(self.size_factor, self.wing_up, self.is_collided, legs_visible,
+                                                           detail)
 
-        # Bird wing - more detailed and animated
-        wing_y = self.y - int(10 * self.size_factor) if self.wing_up else self.y + int(5 * self.size_factor)
-        pygame.draw.ellipse(self.screen, ORANGE, (
-            self.x - int(15 * self.size_factor),
-            wing_y,
-            int(25 * self.size_factor),
-            int(12 * self.size_factor)
+        # Uncomment to debug collision box
+        # collision_rect = self.get_collision_rect()
+        # pygame.draw.rect(self.screen, (255, 0, 0), collision_rect, 1)
+
+        # The sprite matches draw_bird() on the screen pixel for pixel, except
+        # while the bird pokes above the top edge: draw_bird() then clips its
+        # shapes there and rounds a few edge pixels differently.
+        return self.screen.blit(sprite, (int(self.x) - offset_x, int(y) - offset_y))
+
+
+class BirdSpriteCache:
+    # Pre-rendered bird images keyed by (size, wing, collision, legs, detail). The
+    # size only grows during a game, so once the bird gets bigger the smaller
+    # variants can no longer be reached and are dropped.
+    def __init__(self):
+        self.sprites = {}
+        self.current_size = None
+
+    def get(self, size_factor, wing_up, is_collided, legs_visible, detail=True):
+        # Returns the sprite and the offset of the bird centre inside it
+        size = round(size_factor, 2)
+        if size != self.current_size:
+            if self.current_size is not None and size > self.current_size:
+                self.evict_below(size)
+            self.current_size = size
+
+        key = (size, wing_up, is_collided, legs_visible, detail)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = render_bird(size_factor, wing_up, is_collided, legs_visible, detail)
+        return sprite
+
+    def evict_below(self, size):
+        for key in [key for key in self.sprites if key[0] < size]:
+            del self.sprites[key]
+
+
+def render_bird(size_factor, wing_up, is_collided, legs_visible, detail=True):
+    # Draw one bird variant onto its own transparent surface
+    left = int(36 * size_factor) + 2
+    top = int(19 * size_factor) + 2
+    width = left + int(33 * size_factor) + 3
+    height = top + int(19 * size_factor) + 3
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    draw_bird(surface, left, top, size_factor, wing_up, is_collided, legs_visible, detail)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha()
+    return surface, left, top
+
+
+def draw_bird(surface, x, y, size_factor, wing_up, is_collided, legs_visible, detail=True):
+    # Create a more detailed bird with sprite-like drawing
+    # Calculate scaled dimensions based on size factor
+    width = int(40 * size_factor)
+    height = int(30 * size_factor)
+
+    # Bird body
+    pygame.draw.ellipse(surface, YELLOW, (
+        x - width // 2,
+        y - height // 2,
+        width,
+        height
+    ))
+
+    # Add shading to body for more dimension
+    if detail:
+        pygame.draw.ellipse(surface, (240, 210, 0), (
+            x - int(15 * size_factor),
+            y - int(12 * size_factor),
+            int(30 * size_factor),
+            int(20 * size_factor)
         ))
 
-        # Wing details
-        pygame.draw.arc(self.screen, (200, 100, 0), (
-            self.x - int(15 * self.size_factor),
+    # Bird belly
+    pygame.draw.ellipse(surface, WHITE, (
+        x - int(10 * size_factor),
+        y - int(5 * size_factor),
+        int(25 * size_factor),
+        int(15 * size_factor)
+    ))
+
+    # Bird wing - more detailed and animated
+    wing_y = y - int(10 * size_factor) if wing_up else y + int(5 * size_factor)
+    pygame.draw.ellipse(surface, ORANGE, (
+        x - int(15 * size_factor),
+        wing_y,
+        int(25 * size_factor),
+        int(12 * size_factor)
+    ))
+
+    # Wing details
+    if detail:
+        pygame.draw.arc(surface, (200, 100, 0), (
+            x - int(15 * size_factor),
             wing_y,
-            int(25 * self.size_factor),
-            int(12 * self.size_factor)
+            int(25 * size_factor),
+            int(12 * size_factor)
         ), 0, 3.14, 2)
 
-        # Bird beak - normal or flattened based on collision state
-        if self.is_collided:
-            # Flattened beak for collision state
-            pygame.draw.polygon(self.screen, ORANGE, [
-                (self.x + int(18 * self.size_factor), self.y - int(3 * self.size_factor)),
-                (self.x + int(25 * self.size_factor), self.y),
-                (self.x + int(18 * self.size_factor), self.y + int(3 * self.size_factor))
-            ])
-        else:
-            # Normal pointed beak
-            pygame.draw.polygon(self.screen, ORANGE, [
-                (self.x + int(18 * self.size_factor), self.y - int(5 * self.size_factor)),
-                (self.x + int(32 * self.size_factor), self.y),
-                (self.x + int(18 * self.size_factor), self.y + int(5 * self.size_factor))
-            ])
-
-        # Bird eye - larger with more detail
-        pygame.draw.circle(self.screen, BLACK, (
-            self.x + int(12 * self.size_factor),
-            self.y - int(8 * self.size_factor)
-        ), int(5 * self.size_factor))
-
-        pygame.draw.circle(self.screen, WHITE, (
-            self.x + int(14 * self.size_factor),
-            self.y - int(10 * self.size_factor)
-        ), int(2 * self.size_factor))
-
-        # Bird tail feathers - more feather-like
-        pygame.draw.polygon(self.screen, ORANGE, [
-            (self.x - int(20 * self.size_factor), self.y - int(10 * self.size_factor)),
-            (self.x - int(35 * self.size_factor), self.y - int(18 * self.size_factor)),
-            (self.x - int(35 * self.size_factor), self.y - int(8 * self.size_factor)),
-            (self.x - int(30 * self.size_factor), self.y),
-            (self.x - int(35 * self.size_factor), self.y + int(8 * self.size_factor)),
-            (self.x - int(35 * self.size_factor), self.y + int(18 * self.size_factor)),
-            (self.x - int(20 * self.size_factor), self.y + int(10 * self.size_factor))
+    # Bird beak - normal or flattened based on collision state
+    if is_collided:
+        # Flattened beak for collision state
+        pygame.draw.polygon(surface, ORANGE, [
+            (x + int(18 * size_factor), y - int(3 * size_factor)),
+            (x + int(25 * size_factor), y),
+            (x + int(18 * size_factor), y + int(3 * size_factor))
+        ])
+    else:
+        # Normal pointed beak
+        pygame.draw.polygon(surface, ORANGE, [
+            (x + int(18 * size_factor), y - int(5 * size_factor)),
+            (x + int(32 * size_factor), y),
+            (x + int(18 * size_factor), y + int(5 * size_factor))
         ])
 
-        # Add details to tail feathers
-        pygame.draw.line(self.screen, (200, 100, 0),
-                         (self.x - int(25 * self.size_factor), self.y - int(5 * self.size_factor)),
-                         (self.x - int(30 * self.size_factor), self.y - int(15 * self.size_factor)),
-                         max(1, int(2 * self.size_factor)))
-
-        pygame.draw.line(self.screen, (200, 100, 0),
-                         (self.x - int(25 * self.size_factor), self.y + int(5 * self.size_factor)),
-                         (self.x - int(30 * self.size_factor), self.y + int(15 * self.size_factor)),
-                         max(1, int(2 * self.size_factor)))
-
-        # Draw legs when bouncing off the ground
-        if self.is_bouncing and pygame.time.get_ticks() - self.bounce_time < 150:
-            # Only draw legs during the first part of the bounce animation
-            leg_length = int(15 * self.size_factor)
-            foot_length = int(10 * self.size_factor)
-
-            # Left leg
-            pygame.draw.line(self.screen, ORANGE,
-                             (self.x - int(5 * self.size_factor), self.y + int(15 * self.size_factor)),
-                             (self.x - int(10 * self.size_factor), self.y + leg_length),
-                             max(1, int(2 * self.size_factor)))
-
-            # Left foot
-            pygame.draw.line(self.screen, ORANGE,
-                             (self.x - int(10 * self.size_factor), self.y + leg_length),
-                             (self.x - int(15 * self.size_factor), self.y + leg_length),
-                             max(1, int(2 * self.size_factor)))
-
-            # Right leg
-            pygame.draw.line(self.screen, ORANGE,
-                             (self.x + int(5 * self.size_factor), self.y + int(15 * self.size_factor)),
-                             (self.x + int(10 * self.size_factor), self.y + leg_length),
-                             max(1, int(2 * self.size_factor)))
-
-            # Right foot
-            pygame.draw.line(self.screen, ORANGE,
-                             (self.x + int(10 * self.size_factor), self.y + leg_length),
-                             (self.x + int(20 * self.size_factor), self.y + leg_length),
-                             max(1, int(2 * self.size_factor)))
-
-        # Uncomment to debug collision box
-        # collision_rect = self.get_collision_rect()
-        # pygame.draw.rect(self.screen, (255, 0, 0), collision_rect, 1)
\ No newline at end of file
+    # Bird eye - larger with more detail
+    pygame.draw.circle(surface, BLACK, (
+        x + int(12 * size_factor),
+        y - int(8 * size_factor)
+    ), int(5 * size_factor))
+
+    pygame.draw.circle(surface, WHITE, (
+        x + int(14 * size_factor),
+        y - int(10 * size_factor)
+    ), int(2 * size_factor))
+
+    # Bird tail feathers - more feather-like
+    pygame.draw.polygon(surface, ORANGE, [
+        (x - int(20 * size_factor), y - int(10 * size_factor)),
+        (x - int(35 * size_factor), y - int(18 * size_factor)),
+        (x - int(35 * size_factor), y - int(8 * size_factor)),
+        (x - int(30 * size_factor), y),
+        (x - int(35 * size_factor), y + int(8 * size_factor)),
+        (x - int(35 * size_factor), y + int(18 * size_factor)),
+        (x - int(20 * size_factor), y + int(10 * size_factor))
+    ])
+
+    # Add details to tail feathers
+    if detail:
+        pygame.draw.line(surface, (200, 100, 0),
+                         (x - int(25 * size_factor), y - int(5 * size_factor)),
+                         (x - int(30 * size_factor), y - int(15 * size_factor)),
+                         max(1, int(2 * size_factor)))
+
+        pygame.draw.line(surface, (200, 100, 0),
+                         (x - int(25 * size_factor), y + int(5 * size_factor)),
+                         (x - int(30 * size_factor), y + int(15 * size_factor)),
+                         max(1, int(2 * size_factor)))
+
+    # Draw legs when bouncing off the ground
+    if legs_visible:
+        # Only draw legs during the first part of the bounce animation
+        leg_length = int(15 * size_factor)
+        foot_length = int(10 * size_factor)
+
+        # Left leg
+        pygame.draw.line(surface, ORANGE,
+                         (x - int(5 * size_factor), y + int(15 * size_factor)),
+                         (x - int(10 * size_factor), y + leg_length),
+                         max(1, int(2 * size_factor)))
+
+        # Left foot
+        pygame.draw.line(surface, ORANGE,
+                         (x - int(10 * size_factor), y + leg_length),
+                         (x - int(15 * size_factor), y + leg_length),
+                         max(1, int(2 * size_factor)))
+
+        # Right leg
+        pygame.draw.line(surface, ORANGE,
+                         (x + int(5 * size_factor), y + int(15 * size_factor)),
+                         (x + int(10 * size_factor), y + leg_length),
+                         max(1, int(2 * size_factor)))
+
+        # Right foot
+        pygame.draw.line(surface, ORANGE,
+                         (x + int(10 * size_factor), y + leg_length),
+                         (x + int(20 * size_factor), y + leg_length),
+                         max(1, int(2 * size_factor)))
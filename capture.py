@@ -0,0 +1,211 @@
+import os
+import sys
+import zlib
+import struct
+import shutil
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+from settings import FPS, SIM_RATE, CLIP_SECONDS
+
+# Capture file layout (little endian):
+#   header  - magic, version, width, height, pitch, fps, bytes per pixel, the
+#             red, green and blue shifts of the captured surface and whether
+#             frames are compressed
+#   frames  - capture number and payload size, then the surface's raw pixel
+#             rows, zlib compressed unless the capture was made with level 0
+# Capture numbers count capture() calls, so frames dropped under load show
+# up as gaps and export can hold the previous frame to keep timing.
+CAPTURE_MAGIC = b'FBCP'
+CAPTURE_VERSION = 1
+CAPTURE_HEADER = struct.Struct('<4sBHHHHBBBBB')
+FRAME_RECORD = struct.Struct('<II')
+CAPTURE_EXTENSION = '.fbc'
+
+STAGING_SLOTS = 16  # raw frames the writer thread may fall behind by
+COMPRESS_LEVEL = 1  # zlib level; 1 keeps up with 60 fps on one core
+
+
+class FrameCapture:
+    # Copies each rendered frame of a surface into a preallocated ring of raw
+    # pixel buffers. A writer thread compresses the frames, streams them to
+    # path (if given) and keeps the last clip_seconds of them for save_clip(),
+    # which writes clips to clip_dir by default.
+    # capture() is a single memcpy and never waits: when the writer is a full
+    # ring behind, the frame is dropped and counted instead.
+    def __init__(self, surface, path=None, fps=FPS or SIM_RATE, clip_seconds=CLIP_SECONDS, clip_dir='.',
+                 slots=STAGING_SLOTS, compress_level=COMPRESS_LEVEL):
+        self.surface = surface
+        self.width, self.height = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bytesize = surface.get_bytesize()
+        self.shifts = surface.get_shifts()[:3]
+        self.fps = fps
+        self.compress_level = compress_level
+        self.ring = np.empty((slots, self.height * self.pitch), dtype=np.uint8)
+        self.numbers = [0] * slots
+        # produced is only advanced by capture() and consumed only by the
+        # writer, so the two threads need no lock to share the ring
+        self.produced = 0
+        self.consumed = 0
+        self.captures = 0
+        self.dropped = 0
+        self.written = 0
+        # Compressed (number, payload) records of the latest clip_seconds
+        self.clip = deque(maxlen=max(1, int(clip_seconds * fps)))
+        self.clip_requests = deque()
+        self.clip_dir = clip_dir
+        self.header = CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, self.width, self.height, self.pitch,
+                                          fps, self.bytesize, *self.shifts, bool(compress_level))
+        self.file = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.file = open(path, 'wb')
+            self.file.write(self.header)
+        self.running = True
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self.write_frames, name='frame-capture', daemon=True)
+        self.thread.start()
+
+    def capture(self):
+        # Call after the frame is on screen. Returns False if it was dropped.
+        self.captures += 1
+        slots = len(self.ring)
+        if self.produced - self.consumed >= slots:
+            self.dropped += 1
+            return False
+        slot = self.produced % slots
+        np.copyto(self.ring[slot], np.frombuffer(self.surface.get_buffer(), dtype=np.uint8))
+        self.numbers[slot] = self.captures
+        self.produced += 1
+        self.wake.set()
+        return True
+
+    def save_clip(self, path=None):
+        # Write the last clip_seconds of frames to path, clip_<capture>.fbc
+        # in clip_dir by default. The writer thread does the work, so this
+        # returns at once with the path.
+        if path is None:
+            path = os.path.join(self.clip_dir, 'clip_%d%s' % (self.captures, CAPTURE_EXTENSION))
+        self.clip_requests.append(path)
+        self.wake.set()
+        return path
+
+    def write_frames(self):
+        # Writer thread. zlib and file writes release the GIL, so this runs
+        # alongside the game loop rather than in between its frames.
+        while True:
+            self.wake.wait()
+            self.wake.clear()
+            while self.consumed < self.produced:
+                slot = self.consumed % len(self.ring)
+                pixels = self.ring[slot]
+                payload = zlib.compress(pixels, self.compress_level) if self.compress_level else pixels.tobytes()
+                record = (self.numbers[slot], payload)
+                self.consumed += 1
+                self.clip.append(record)
+                if self.file:
+                    self.file.write(FRAME_RECORD.pack(record[0], len(payload)))
+                    self.file.write(payload)
+                self.written += 1
+            while self.clip_requests:
+                self.write_clip(self.clip_requests.popleft())
+            if not self.running:
+                break
+
+    def write_clip(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self.header)
+            for number, payload in list(self.clip):
+                f.write(FRAME_RECORD.pack(number, len(payload)))
+                f.write(payload)
+
+    def close(self):
+        # Flush every captured frame and pending clip, then stop the writer
+        self.running = False
+        self.wake.set()
+        self.thread.join()
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def read_capture(path):
+    # Yields (capture number, RGB array of shape (height, width, 3))
+    with open(path, 'rb') as f:
+        magic, version, width, height, pitch, fps, bytesize, red, green, blue, compressed = CAPTURE_HEADER.unpack(
+            f.read(CAPTURE_HEADER.size))
+        if magic != CAPTURE_MAGIC:
+            raise ValueError('Not a capture file')
+        if version != CAPTURE_VERSION:
+            raise ValueError('Unsupported capture version %d' % version)
+        # Byte of each channel within a little-endian pixel
+        channels = [shift // 8 for shift in (red, green, blue)]
+        while True:
+            record = f.read(FRAME_RECORD.size)
+            if len(record) < FRAME_RECORD.size:
+                return
+            number, size = FRAME_RECORD.unpack(record)
+            payload = f.read(size)
+            if compressed:
+                payload = zlib.decompress(payload)
+            rows = np.frombuffer(payload, dtype=np.uint8).reshape(height, pitch)
+            yield number, rows[:, :width * bytesize].reshape(height, width, bytesize)[..., channels]
+
+
+def capture_info(path):
+    # (width, height, fps) of a capture file
+    with open(path, 'rb') as f:
+        _, _, width, height, _, fps, *_ = CAPTURE_HEADER.unpack(f.read(CAPTURE_HEADER.size))
+    return width, height, fps
+
+
+def export(path, output):
+    # Convert a capture to a video with ffmpeg, or to numbered PNG files
+    # when output is a directory. Dropped frames repeat the previous one.
+    width, height, fps = capture_info(path)
+    frames = read_capture(path)
+    if os.path.splitext(output)[1] and not os.path.isdir(output):
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            raise RuntimeError('ffmpeg not found; export to a directory to get PNG frames')
+        process = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', '%dx%d' % (width, height), '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', output],
+            stdin=subprocess.PIPE)
+        write = lambda index, rgb: process.stdin.write(rgb.tobytes())
+    else:
+        import pygame
+        os.makedirs(output, exist_ok=True)
+        process = None
+        write = lambda index, rgb: pygame.image.save(
+            pygame.image.frombuffer(rgb.tobytes(), (width, height), 'RGB'),
+            os.path.join(output, 'frame_%06d.png' % index))
+
+    count = 0
+    last_number = None
+    for number, rgb in frames:
+        repeats = 1 if last_number is None else max(1, number - last_number)
+        for _ in range(repeats):
+            write(count, rgb)
+            count += 1
+        last_number = number
+    if process:
+        process.stdin.close()
+        if process.wait():
+            raise RuntimeError('ffmpeg failed with exit code %d' % process.returncode)
+    return count
+
+
+if __name__ == '__main__':
+    # python capture.py export <file.fbc> <video file | png directory>
+    if len(sys.argv) != 4 or sys.argv[1] != 'export':
+        print('usage: capture.py export <file%s> <video file | png directory>' % CAPTURE_EXTENSION)
+        sys.exit(2)
+    print('%d frames written to %s' % (export(sys.argv[2], sys.argv[3]), sys.argv[3]))
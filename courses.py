@@ -0,0 +1,230 @@
+import os
+import sys
+import struct
+import argparse
+from collections import OrderedDict
+import numpy as np
+from batch_engine import FOOD_TYPES
+from settings import SCREEN_HEIGHT, GROUND_HEIGHT, SIM_RATE, PIPE_FREQUENCY, FOOD_FREQUENCY_MIN
+
+# A course is everything random about a game that does not depend on how
+# it is played: the gap center of the k-th pipe and the height and type of
+# the k-th food item. Gap size and food_frequency follow from the pipe
+# count and the score, so they stay computed in the engines.
+#
+# Each column of a course is produced in chunks of CHUNK entries, chunk i
+# drawn from its own generator seeded with (seed, column, i). A column is
+# extended only as far as it is read, and no chunk depends on another, so
+# the same seed gives the same course however far and in whatever order
+# it is read.
+CHUNK = 256
+GAP_CENTERS = 0
+FOOD_HEIGHTS = 1
+FOOD_TYPE_INDICES = 2
+
+# Courses by (seed, screen_height, ground_height), or by path for mapped
+# files, shared by every game in the process that flies the same seed
+COURSE_CACHE_SIZE = 256
+_courses = OrderedDict()
+
+# Course file layout (little endian):
+#   header  - magic, version, seed, screen and ground height, chunk size,
+#             then the number of pipes and food items stored
+#   columns - gap centers (int16), food heights (int16), food type indices
+#             (uint8), packed back to back
+COURSE_MAGIC = b'FBCS'
+COURSE_VERSION = 1
+COURSE_HEADER = struct.Struct('<4sBqHHHII')
+COURSE_EXTENSION = '.fbcourse'
+
+
+class ScheduleColumn:
+    # One lazily extended column of a course. Indexing works like a numpy
+    # array of unlimited length: reading entry k generates every chunk up
+    # to it first. The generated entries live in one contiguous array,
+    # which may start out as a read-only memory map of a course file.
+    def __init__(self, generate, dtype, data=None):
+        self.generate = generate
+        self.dtype = dtype
+        self.data = np.empty(0, dtype=dtype) if data is None else data
+        self.length = len(self.data)
+
+    def __len__(self):
+        return self.length
+
+    def extend(self, count):
+        # Make sure the first count entries exist
+        if count <= self.length:
+            return
+        chunks = -(-count // CHUNK)
+        if chunks * CHUNK > len(self.data):
+            # Grow geometrically so extending costs amortized O(1) per entry
+            data = np.empty(max(chunks * CHUNK, 2 * len(self.data)), dtype=self.dtype)
+            data[:self.length] = self.data[:self.length]
+            self.data = data
+        # A mapped file may end mid-chunk; regenerate that chunk whole
+        start = self.length // CHUNK
+        for chunk in range(start, chunks):
+            self.data[chunk * CHUNK:(chunk + 1) * CHUNK] = self.generate(chunk)
+        self.length = chunks * CHUNK
+
+    def __getitem__(self, index):
+        # Negative indices count back from the end of what is generated so
+        # far, never from the spare room at the end of data
+        if isinstance(index, (int, np.integer)):
+            if index >= self.length:
+                self.extend(index + 1)
+            elif index < 0:
+                index += self.length
+                if index < 0:
+                    raise IndexError('course index out of range')
+            return self.data[index]
+        if isinstance(index, slice):
+            if index.stop is not None and index.stop > 0:
+                self.extend(index.stop)
+        else:
+            index = np.asarray(index)
+            if index.size:
+                self.extend(int(index.max()) + 1)
+        return self.data[:self.length][index]
+
+
+class Course:
+    # Pipe and food schedule for one seed. gap_centers[k], food_heights[k]
+    # and food_types[k] (an index into FOOD_TYPES) belong to the (k+1)-th
+    # pipe or food item of a game. Use get_course() to share one instance
+    # between games, or load() to read a saved one.
+    def __init__(self, seed, screen_height=SCREEN_HEIGHT, ground_height=GROUND_HEIGHT, columns=None):
+        self.seed = seed
+        self.screen_height = screen_height
+        self.ground_height = ground_height
+        usable_height = screen_height - ground_height
+        # Same ranges Pipe.set_height and Engine.spawn draw from
+        self.gap_range = (int(usable_height * 0.2), int(usable_height * 0.8))
+        self.food_range = (50, usable_height - 50)
+        columns = columns or (None, None, None)
+        self.gap_centers = ScheduleColumn(self.generate_gap_centers, np.int16, columns[0])
+        self.food_heights = ScheduleColumn(self.generate_food_heights, np.int16, columns[1])
+        self.food_types = ScheduleColumn(self.generate_food_types, np.uint8, columns[2])
+
+    def chunk_rng(self, column, chunk):
+        return np.random.default_rng([self.seed & 0xffffffffffffffff, column, chunk])
+
+    def generate_gap_centers(self, chunk):
+        low, high = self.gap_range
+        return self.chunk_rng(GAP_CENTERS, chunk).integers(low, high, endpoint=True, size=CHUNK)
+
+    def generate_food_heights(self, chunk):
+        low, high = self.food_range
+        return self.chunk_rng(FOOD_HEIGHTS, chunk).integers(low, high, endpoint=True, size=CHUNK)
+
+    def generate_food_types(self, chunk):
+        return self.chunk_rng(FOOD_TYPE_INDICES, chunk).integers(0, len(FOOD_TYPES), size=CHUNK)
+
+    def reserve(self, pipes, foods):
+        # Generate at least this many pipes and food items up front
+        self.gap_centers.extend(pipes)
+        self.food_heights.extend(foods)
+        self.food_types.extend(foods)
+
+    def reserve_frames(self, frames, fps=SIM_RATE):
+        # Enough of the course for any game of up to frames frames
+        milliseconds = frames * 1000 / fps
+        self.reserve(int(milliseconds / PIPE_FREQUENCY) + 2, int(milliseconds / FOOD_FREQUENCY_MIN) + 2)
+
+    def save(self, path):
+        # Write the generated part of the course for load() to map
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        pipes = len(self.gap_centers)
+        foods = min(len(self.food_heights), len(self.food_types))
+        # Written under a temporary name and renamed, so readers never map
+        # a half-written file
+        partial = path + '.partial'
+        with open(partial, 'wb') as f:
+            f.write(COURSE_HEADER.pack(COURSE_MAGIC, COURSE_VERSION, self.seed, self.screen_height,
+                                       self.ground_height, CHUNK, pipes, foods))
+            f.write(self.gap_centers.data[:pipes].astype('<i2').tobytes())
+            f.write(self.food_heights.data[:foods].astype('<i2').tobytes())
+            f.write(self.food_types.data[:foods].tobytes())
+        os.replace(partial, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        # Course backed by a read-only memory map of a save() file. Every
+        # process mapping the file shares the same pages; reading past its
+        # end generates the rest in memory.
+        with open(path, 'rb') as f:
+            header = f.read(COURSE_HEADER.size)
+        if len(header) < COURSE_HEADER.size:
+            raise ValueError('Not a course file')
+        magic, version, seed, screen_height, ground_height, chunk, pipes, foods = COURSE_HEADER.unpack(header)
+        if magic != COURSE_MAGIC:
+            raise ValueError('Not a course file')
+        if version != COURSE_VERSION:
+            raise ValueError('Unsupported course version %d' % version)
+        if chunk != CHUNK:
+            raise ValueError('Course file was made with chunks of %d, not %d' % (chunk, CHUNK))
+        offset = COURSE_HEADER.size
+
+        def column(dtype, count):
+            nonlocal offset
+            data = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,)) if count else None
+            offset += count * np.dtype(dtype).itemsize
+            return data
+
+        columns = (column('<i2', pipes), column('<i2', foods), column(np.uint8, foods))
+        return cls(seed, screen_height, ground_height, columns)
+
+
+def cached(key, build):
+    course = _courses.get(key)
+    if course is None:
+        course = _courses[key] = build()
+        if len(_courses) > COURSE_CACHE_SIZE:
+            _courses.popitem(last=False)
+    else:
+        _courses.move_to_end(key)
+    return course
+
+
+def get_course(seed, screen_height=SCREEN_HEIGHT, ground_height=GROUND_HEIGHT):
+    # The shared Course for a seed. Games flying the same seed read the
+    # chunks the first one generated.
+    return cached((seed, screen_height, ground_height), lambda: Course(seed, screen_height, ground_height))
+
+
+def course_path(directory, seed):
+    return os.path.join(directory, 'course_%d%s' % (seed, COURSE_EXTENSION))
+
+
+def open_course(directory, seed):
+    # The course for a seed from a directory of save() files, mapped when
+    # its file exists and generated otherwise
+    path = course_path(directory, seed)
+    if os.path.exists(path):
+        return cached(path, lambda: Course.load(path))
+    return get_course(seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write course files for a range of seeds')
+    parser.add_argument('directory')
+    parser.add_argument('--seeds', default='0:1000', help='START:STOP (default 0:1000)')
+    parser.add_argument('--frames', type=int, default=36000, help='longest game the files must cover')
+    parser.add_argument('--fps', type=int, default=SIM_RATE)
+    args = parser.parse_args(argv)
+
+    start, stop = (int(part) for part in args.seeds.split(':'))
+    for seed in range(start, stop):
+        course = Course(seed)
+        course.reserve_frames(args.frames, args.fps)
+        course.save(course_path(args.directory, seed))
+    print('%d courses written to %s' % (stop - start, args.directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
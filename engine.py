@@ -0,0 +1,271 @@
+import random
+import masks
+from bird import Bird
+from pipe import Pipe, PipePool
+from food import Food
+from batch_engine import FOOD_TYPES
+from entities import EntityStore
+from settings import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, SIM_RATE, PHYSICS_RATE, GRAVITY, FLAP_STRENGTH, GAME_SPEED,
+    PIPE_FREQUENCY, GROUND_HEIGHT, FOOD_FREQUENCY_START, FOOD_FREQUENCY_MIN, COLLISION_MASKS
+)
+
+
+class FrameClock:
+    # Simulation clock that advances a fixed amount per frame instead of
+    # following the wall clock, so physics does not depend on real time
+    def __init__(self, fps=SIM_RATE):
+        self.fps = fps
+        self.frame = 0
+
+    def tick(self):
+        self.frame += 1
+
+    def get_ticks(self):
+        # Milliseconds of simulated time, same units as pygame.time.get_ticks
+        return self.frame * 1000 // self.fps
+
+    def reset(self):
+        self.frame = 0
+
+
+class Engine:
+    # Game logic of main.main() without any display or event handling.
+    # Each call to step() advances exactly one frame of the game.
+    def __init__(self, screen=None, fps=SIM_RATE, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 ground_height=GROUND_HEIGHT, game_speed=GAME_SPEED, rng=None, collision_masks=COLLISION_MASKS):
+        # Screen is only needed if the bird is going to be drawn
+        self.screen = screen
+        # Gameplay randomness, the global random module by default
+        self.rng = rng or random
+        self.SCREEN_WIDTH = screen_width
+        self.SCREEN_HEIGHT = screen_height
+        self.GROUND_HEIGHT = ground_height
+        self.GAME_SPEED = game_speed
+        self.clock = FrameClock(fps)
+        # fps is the simulation rate. The physics constants are per step at
+        # PHYSICS_RATE, so other rates scale speeds by dt and accelerations
+        # by dt squared; spawn and bounce timers already run on clock time.
+        self.dt = dt = PHYSICS_RATE / fps
+        self.step_speed = game_speed * dt
+        self.bird = Bird(
+            screen=screen,
+            screen_width=screen_width,
+            screen_height=screen_height,
+            gravity=GRAVITY * dt * dt,
+            flap_strength=FLAP_STRENGTH * dt,
+            ground_height=ground_height,
+            get_ticks=self.clock.get_ticks,
+            dt=dt
+        )
+        self.pipe_pool = PipePool(screen_width, screen_height, ground_height, self.step_speed)
+        # Pipes and food in x order; pipes go back to the pool when they expire
+        self.pipes = EntityStore(screen_width // 10, on_expire=self.pipe_pool.release)
+        self.foods = EntityStore(Food.SIZE)
+        # Food is tested against the largest box the bird can grow to, since
+        # eating earlier food in the same frame can grow it mid-loop
+        self.food_reach = int(30 * self.bird.max_size_factor) // 2 + 1
+        # Narrow phase: the bird's collision box, or with collision_masks
+        # the bird and food as drawn (see masks.py). Masks reach further
+        # than the box, so the broadphase widens to the largest bird mask.
+        self.collision_masks = collision_masks
+        self.collide_pipe = Pipe.collide
+        self.collide_food_item = Food.collide
+        self.mask_reach = None
+        if collision_masks:
+            bird = self.bird
+            masks.build_masks(bird.max_size_factor, bird.size_increase)
+            self.collide_pipe = masks.collide_pipe
+            self.collide_food_item = masks.collide_food
+            self.mask_reach = masks.bird_reach(bird.max_size_factor, bird.size_increase)
+            self.food_reach = max(self.food_reach, self.mask_reach + 1)
+        # Random state as of the last snapshot(); the engine only draws from
+        # rng when it spawns, so the state is re-read only after a spawn
+        self.rng_state = None
+        self.rng_dirty = True
+        self.reset()
+
+    def reset(self, seed=None, course=None):
+        # Restart the game in place - the bird, pipe pool and lists are reused
+        # A seed switches the engine to its own random.Random for reproducible runs.
+        # A courses.Course supplies the pipe gaps and food instead of rng,
+        # until a reset without one.
+        if seed is not None:
+            self.rng = random.Random(seed)
+        self.course = course
+        self.rng_dirty = True
+        self.clock.reset()
+        self.bird.reset()
+        # Bird height before the latest step, for interpolated rendering
+        self.prev_bird_y = self.bird.y
+        self.pipes.clear()
+        self.foods.clear()
+        self.last_pipe_time = self.clock.get_ticks()
+        self.last_food_time = self.clock.get_ticks()
+        self.food_frequency = FOOD_FREQUENCY_START
+        self.total_pipes_generated = 0
+        self.total_foods_generated = 0
+        self.score = 0
+        self.food_count = 0
+        self.game_over = False
+
+    def snapshot(self):
+        # Full game state as nested tuples of plain values - no Surfaces, so
+        # copying it costs microseconds. restore() puts it back, on this
+        # engine or any other built with the same settings.
+        if self.rng_dirty or self.rng is random:
+            # The global random module can be drawn from by anyone, so its
+            # state is never cached
+            self.rng_state = self.rng.getstate()
+            self.rng_dirty = False
+        return (
+            self.clock.frame, self.prev_bird_y, self.last_pipe_time, self.last_food_time, self.food_frequency,
+            self.total_pipes_generated, self.total_foods_generated, self.score, self.food_count, self.game_over,
+            self.bird.snapshot(),
+            tuple([pipe.snapshot() for pipe in self.pipes]),
+            tuple([food.snapshot() for food in self.foods]),
+            self.rng_state,
+            self.course,
+        )
+
+    def restore(self, state):
+        (self.clock.frame, self.prev_bird_y, self.last_pipe_time, self.last_food_time, self.food_frequency,
+         self.total_pipes_generated, self.total_foods_generated, self.score, self.food_count, self.game_over,
+         bird, pipes, foods, rng_state, self.course) = state
+        self.bird.restore(bird)
+        self.pipes.clear()
+        for pipe in pipes:
+            self.pipes.append(self.pipe_pool.restore(pipe))
+        self.foods.clear()
+        for food in foods:
+            self.foods.append(Food.restored(food))
+        # Skip the costly setstate when rng has not moved since that state
+        if self.rng_dirty or rng_state is not self.rng_state or self.rng is random:
+            self.rng.setstate(rng_state)
+            self.rng_state = rng_state
+            self.rng_dirty = False
+
+    @property
+    def frame(self):
+        return self.clock.frame
+
+    def step(self, action=False):
+        # action is truthy to flap this frame. Returns True once the game is over.
+        # step_marked below is the same sequence of phases with a mark after
+        # each; change both together.
+        self.clock.tick()
+        self.prev_bird_y = self.bird.y
+        if action and not self.game_over:
+            self.bird.flap()
+        self.spawn()
+        if not self.game_over:
+            self.update_pipes()
+        if not self.game_over:
+            self.update_food()
+            self.collide_food()
+        return self.update_bird()
+
+    def step_marked(self, action, mark):
+        # step() calling mark with each phase's name as the phase ends, for
+        # profiler.profiled_step. Kept apart so step() pays nothing for it.
+        self.clock.tick()
+        self.prev_bird_y = self.bird.y
+        if action and not self.game_over:
+            self.bird.flap()
+        self.spawn()
+        mark('spawn')
+        if not self.game_over:
+            self.update_pipes()
+        mark('pipe_update')
+        if not self.game_over:
+            self.update_food()
+            mark('food_update')
+            self.collide_food()
+        else:
+            mark('food_update')
+        mark('food_collide')
+        game_over = self.update_bird()
+        mark('bird_update')
+        return game_over
+
+    def spawn(self):
+        # Add new pipes
+        current_time = self.clock.get_ticks()
+        if current_time - self.last_pipe_time > PIPE_FREQUENCY and not self.game_over:
+            self.total_pipes_generated += 1
+            course = self.course
+            self.pipes.append(self.pipe_pool.acquire(
+                x=self.SCREEN_WIDTH,
+                score_count=self.score,
+                total_pipes=self.total_pipes_generated,
+                rng=self.rng,
+                gap_center=None if course is None else int(course.gap_centers[self.total_pipes_generated - 1])
+            ))
+            self.last_pipe_time = current_time
+            if course is None:
+                self.rng_dirty = True
+
+        # Add new food items
+        if current_time - self.last_food_time > self.food_frequency and not self.game_over:
+            self.total_foods_generated += 1
+            course = self.course
+            if course is None:
+                food_y = self.rng.randint(50, self.SCREEN_HEIGHT - self.GROUND_HEIGHT - 50)
+                self.foods.append(Food(self.SCREEN_WIDTH, food_y, self.step_speed, rng=self.rng))
+                self.rng_dirty = True
+            else:
+                number = self.total_foods_generated - 1
+                self.foods.append(Food(self.SCREEN_WIDTH, int(course.food_heights[number]), self.step_speed,
+                                       food_type=FOOD_TYPES[course.food_types[number]]))
+            self.last_food_time = current_time
+            # Gets more frequent with score
+            self.food_frequency = max(FOOD_FREQUENCY_MIN, FOOD_FREQUENCY_START - self.score * 50)
+
+    def update_pipes(self):
+        # Move, collide and score pipes. Broadphase: only pipes overlapping
+        # the bird's x-span get the narrow-phase collide() test.
+        bird = self.bird
+        half_width = self.mask_reach or bird.collision_width // 2
+        bird_left = bird.x - half_width - 1
+        bird_right = bird.x + half_width + 1
+        pipe_width = self.pipes.width
+        collide = self.collide_pipe
+
+        # A collision ends the loop, which freezes the remaining pipes for
+        # this frame exactly like the windowed game
+        for pipe in self.pipes:
+            pipe.update()
+            if pipe.x < bird_right and pipe.x + pipe_width > bird_left and collide(pipe, bird):
+                self.game_over = True
+                bird.alive = False
+                bird.set_collision()
+                break
+
+            if not pipe.passed and pipe.x < bird.x - 20:
+                pipe.passed = True
+                self.score += 1
+        self.pipes.expire()
+
+    def update_food(self):
+        # Eaten food stays in the store, inactive, until it scrolls off
+        # screen, so nothing is removed from the middle
+        foods = self.foods
+        for food in foods:
+            food.update()
+        foods.expire()
+
+    def collide_food(self):
+        bird = self.bird
+        collide = self.collide_food_item
+        for food in self.foods.span(bird.x - self.food_reach, bird.x + self.food_reach):
+            if food.active and collide(food, bird):
+                bird.eat_food(food.food_type)
+                food.active = False
+                self.food_count += 1
+
+    def update_bird(self):
+        # Always update bird to allow falling after collision
+        self.bird.update()
+        if not self.bird.alive:
+            self.game_over = True
+        return self.game_over
@@ -0,0 +1,52 @@
+from collections import deque
+
+
+class EntityStore:
+    # Pipes or food items in spawn order. Everything in one store spawns at
+    # the right edge and scrolls left at the same speed, so spawn order is
+    # also x order: entities leave from the left end, O(1) each, and the ones
+    # near the bird form a single run that span() can find without looking
+    # at the rest of the screen.
+    def __init__(self, width, on_expire=None):
+        # width is how far each entity extends right of its x
+        self.width = width
+        # Called with every entity dropped from the store, e.g. to pool it
+        self.on_expire = on_expire
+        self.items = deque()
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def append(self, entity):
+        self.items.append(entity)
+
+    def expire(self):
+        # Drop the entities that scrolled past the left edge of the screen
+        items = self.items
+        limit = -self.width
+        while items and items[0].x <= limit:
+            entity = items.popleft()
+            if self.on_expire:
+                self.on_expire(entity)
+
+    def clear(self):
+        if self.on_expire:
+            for entity in self.items:
+                self.on_expire(entity)
+        self.items.clear()
+
+    def span(self, left, right):
+        # Entities overlapping the x range (left, right), scanning from the
+        # left edge and stopping at the first one that starts past right
+        width = self.width
+        for entity in self.items:
+            if entity.x >= right:
+                break
+            if entity.x + width > left:
+                yield entity
@@ -0,0 +1,201 @@
+import random
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from engine import Engine
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Observation layout - everything scaled to roughly [-1, 1]
+OBS_SIZE = 8
+OBS_BIRD_Y = 0
+OBS_VEL_Y = 1
+OBS_SIZE_FACTOR = 2
+OBS_PIPE_DX = 3
+OBS_PIPE_TOP = 4
+OBS_PIPE_BOTTOM = 5
+OBS_FOOD_DX = 6
+OBS_FOOD_DY = 7
+
+# Rewards
+PIPE_REWARD = 1.0
+DEATH_REWARD = -1.0
+
+
+def observe(engine, out=None):
+    # Write the observation for an Engine into out (allocated if not given)
+    if out is None:
+        out = np.zeros(OBS_SIZE, dtype=np.float32)
+    bird = engine.bird
+    bird_left = bird.x - bird.collision_width // 2
+
+    out[OBS_BIRD_Y] = bird.y / SCREEN_HEIGHT
+    out[OBS_VEL_Y] = bird.vel_y / 10
+    out[OBS_SIZE_FACTOR] = bird.size_factor
+
+    # Next pipe the bird has not yet cleared; pipes are kept in spawn order
+    out[OBS_PIPE_DX] = 1.0
+    out[OBS_PIPE_TOP] = 0.0
+    out[OBS_PIPE_BOTTOM] = (engine.SCREEN_HEIGHT - engine.GROUND_HEIGHT) / SCREEN_HEIGHT
+    for pipe in engine.pipes:
+        if pipe.x + pipe.PIPE_TOP.get_width() > bird_left:
+            out[OBS_PIPE_DX] = (pipe.x - bird.x) / SCREEN_WIDTH
+            out[OBS_PIPE_TOP] = pipe.height / SCREEN_HEIGHT
+            out[OBS_PIPE_BOTTOM] = pipe.bottom / SCREEN_HEIGHT
+            break
+
+    # Next food item still ahead of the bird
+    out[OBS_FOOD_DX] = 1.0
+    out[OBS_FOOD_DY] = 0.0
+    for food in engine.foods:
+        if food.active and food.x + food.width > bird_left:
+            out[OBS_FOOD_DX] = (food.x - bird.x) / SCREEN_WIDTH
+            out[OBS_FOOD_DY] = (food.y + food.height / 2 - bird.y) / SCREEN_HEIGHT
+            break
+    return out
+
+
+class FlappyEnv:
+    # Gym-style wrapper around the headless Engine
+    def __init__(self, seed=None, max_steps=None):
+        # Each env owns its random stream so envs sharing a process stay independent
+        self.engine = Engine(rng=random.Random(seed))
+        self.max_steps = max_steps
+        self.obs = np.zeros(OBS_SIZE, dtype=np.float32)
+
+    def reset(self, seed=None):
+        # Without a seed the next game continues the env's random stream
+        self.engine.reset(seed=seed)
+        return observe(self.engine, self.obs)
+
+    def step(self, action):
+        engine = self.engine
+        score = engine.score
+        done = engine.step(action)
+
+        reward = (engine.score - score) * PIPE_REWARD
+        if done:
+            reward += DEATH_REWARD
+
+        info = {'score': engine.score, 'food_count': engine.food_count, 'frame': engine.frame}
+        if self.max_steps is not None and engine.frame >= self.max_steps and not done:
+            done = True
+            info['truncated'] = True
+        return observe(engine, self.obs), reward, done, info
+
+
+def _worker(conn, names, num_envs, start, stop, seed, max_steps):
+    # Runs envs[start:stop] and writes results straight into shared memory
+    buffers = [shared_memory.SharedMemory(name=name) for name in names]
+    obs, actions, rewards, dones, scores = _views(buffers, num_envs)
+    envs = [FlappyEnv(max_steps=max_steps) for _ in range(start, stop)]
+
+    try:
+        while True:
+            command = conn.recv()
+            if command == 'close':
+                break
+            # Every command gets a reply, so the parent never waits on a
+            # worker that failed; an error goes back to be raised there
+            try:
+                if command == 'step':
+                    for i, env in enumerate(envs, start):
+                        obs[i], rewards[i], dones[i], info = env.step(actions[i])
+                        scores[i] = info['score']
+                        if dones[i]:
+                            # Auto-reset so the next step starts a fresh game
+                            obs[i] = env.reset()
+                elif command == 'reset':
+                    for i, env in enumerate(envs, start):
+                        obs[i] = env.reset(None if seed is None else seed + i)
+                reply = True
+            except Exception as error:
+                reply = error
+                error.worker_traceback = traceback.format_exc()
+            try:
+                conn.send(reply)
+            except Exception:
+                # The error itself could not be pickled; send its traceback
+                conn.send(RuntimeError('env worker failed:\n' + reply.worker_traceback))
+    finally:
+        for buffer in buffers:
+            buffer.close()
+        conn.close()
+
+
+def _views(buffers, num_envs):
+    # Numpy views over the shared buffers, in the order they are allocated
+    return (
+        np.ndarray((num_envs, OBS_SIZE), dtype=np.float32, buffer=buffers[0].buf),
+        np.ndarray(num_envs, dtype=np.bool_, buffer=buffers[1].buf),
+        np.ndarray(num_envs, dtype=np.float32, buffer=buffers[2].buf),
+        np.ndarray(num_envs, dtype=np.bool_, buffer=buffers[3].buf),
+        np.ndarray(num_envs, dtype=np.int64, buffer=buffers[4].buf),
+    )
+
+
+class SubprocVecEnv:
+    # Shards num_envs FlappyEnvs across a pool of worker processes. Actions
+    # and results travel through shared memory; the pipes only carry a short
+    # command and an acknowledgement per step.
+    def __init__(self, num_envs, num_workers=None, seed=None, max_steps=None, start_method=None):
+        self.num_envs = num_envs
+        num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        ctx = mp.get_context(start_method)
+
+        sizes = [num_envs * OBS_SIZE * 4, num_envs, num_envs * 4, num_envs, num_envs * 8]
+        self._buffers = [shared_memory.SharedMemory(create=True, size=size) for size in sizes]
+        self.obs, self.actions, self.rewards, self.dones, self.scores = _views(self._buffers, num_envs)
+        names = [buffer.name for buffer in self._buffers]
+
+        self._conns = []
+        self._processes = []
+        for shard in np.array_split(np.arange(num_envs), num_workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(child, names, num_envs, int(shard[0]), int(shard[-1]) + 1, seed, max_steps),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+        self.closed = False
+
+    def _broadcast(self, command):
+        for conn in self._conns:
+            conn.send(command)
+        # Collect every reply before raising, so the pipes stay in step
+        errors = [reply for reply in [conn.recv() for conn in self._conns] if isinstance(reply, BaseException)]
+        if errors:
+            raise errors[0]
+
+    def reset(self):
+        self._broadcast('reset')
+        return self.obs.copy()
+
+    def step(self, actions):
+        # Returns copies so callers can keep them across steps
+        self.actions[:] = actions
+        self._broadcast('step')
+        infos = {'score': self.scores.copy()}
+        return self.obs.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+    def close(self):
+        if self.closed:
+            return
+        for conn in self._conns:
+            conn.send('close')
+        for process in self._processes:
+            process.join()
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
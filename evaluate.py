@@ -0,0 +1,372 @@
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import argparse
+import importlib
+import importlib.util
+import multiprocessing as mp
+from collections import Counter
+from engine import Engine
+from courses import get_course, open_course
+from settings import SIM_RATE, COLLISION_MASKS
+
+# One row per game, in this order in every output format
+FIELDS = ('seed', 'score', 'food_eaten', 'size_factor', 'frames', 'cause')
+METRICS = ('score', 'food_eaten', 'size_factor', 'frames')
+
+# Death causes. Only a pipe ends a game - the bird bounces off the ground
+# and stops at the ceiling - so a crash is put down to the ground when the
+# bird's bottom is at or below it on the final frame, to the ceiling when
+# the bird pokes above the top of the screen, and to the pipe otherwise.
+PIPE = 'pipe'
+GROUND = 'ground'
+CEILING = 'ceiling'
+TIMEOUT = 'timeout'  # still flying after max_frames
+CAUSES = (PIPE, GROUND, CEILING, TIMEOUT)
+
+CHUNK_SEEDS = 16  # games per task sent to a worker
+QUEUED_CHUNKS = 4  # tasks per worker in flight, which bounds memory use
+PARQUET_ROWS = 10000  # rows per Parquet row group
+
+
+def gap_policy(engine):
+    # Scripted baseline: flap when falling below the middle of the next gap
+    bird = engine.bird
+    for pipe in engine.pipes:
+        if pipe.x + pipe.width > bird.x - bird.collision_width // 2:
+            return bird.vel_y > 0 and bird.y > (pipe.height + pipe.bottom) / 2
+    return bird.vel_y > 0 and bird.y > (engine.SCREEN_HEIGHT - engine.GROUND_HEIGHT) / 2
+
+
+def load_policy(spec):
+    # policy(engine) -> flap from a saved evolve.py model (.npy champion or
+    # .npz checkpoint), or a callable named module:name or file.py:name
+    if spec.endswith(('.npy', '.npz')):
+        from evolve import genome_policy
+        return genome_policy(spec)
+    module_name, _, name = spec.rpartition(':')
+    if not module_name or not name:
+        raise ValueError('policy must be a .npy/.npz model or module:callable, not %r' % spec)
+    if module_name.endswith('.py'):
+        module_spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(module_name))[0], module_name)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    policy = getattr(module, name)
+    if not callable(policy):
+        raise ValueError('%s is not callable' % spec)
+    return policy
+
+
+def death_cause(engine):
+    # From where the bird is, not is_bouncing, which stays set for a while
+    # after the bird has left the ground
+    bird = engine.bird
+    if not engine.game_over:
+        return TIMEOUT
+    if bird.y + bird.collision_height // 2 >= engine.SCREEN_HEIGHT - engine.GROUND_HEIGHT:
+        return GROUND
+    if bird.y - bird.collision_height // 2 < 0:
+        return CEILING
+    return PIPE
+
+
+def play(engine, policy, seed, max_frames, course=None):
+    # Fly one seeded game to its end or max_frames, on course if given.
+    # Returns a FIELDS row.
+    engine.reset(seed=seed, course=course)
+    step = engine.step
+    while engine.frame < max_frames:
+        if step(policy(engine)):
+            break
+    return (seed, engine.score, engine.food_count, round(engine.bird.size_factor, 2), engine.frame,
+            death_cause(engine))
+
+
+# Per-process game state, set up once by init_worker
+_worker = None
+
+
+def init_worker(policy_spec, fps, max_frames, collision_masks, courses, course_dir):
+    global _worker
+    _worker = (Engine(fps=fps, collision_masks=collision_masks), load_policy(policy_spec), max_frames, courses,
+               course_dir)
+
+
+def seed_course(seed, courses, course_dir):
+    # The courses.Course game seed flies, or None for its random.Random
+    if course_dir:
+        return open_course(course_dir, seed)
+    return get_course(seed) if courses else None
+
+
+def play_seeds(seeds):
+    engine, policy, max_frames, courses, course_dir = _worker
+    return [play(engine, policy, seed, max_frames, seed_course(seed, courses, course_dir)) for seed in seeds]
+
+
+class Distribution:
+    # Exact summary statistics of a stream of values. Only the count of
+    # each distinct value is kept; game results take few distinct values
+    # (frames at most max_frames), so memory stays small however many
+    # games are played.
+    def __init__(self):
+        self.counts = Counter()
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def add(self, value):
+        self.counts[value] += 1
+        self.n += 1
+        self.total += value
+        self.squares += value * value
+
+    def quantile(self, q):
+        rank = q * (self.n - 1)
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen > rank:
+                return value
+
+    def summary(self):
+        if not self.n:
+            return {'count': 0}
+        mean = self.total / self.n
+        return {
+            'count': self.n,
+            'mean': mean,
+            'std': max(self.squares / self.n - mean * mean, 0) ** 0.5,
+            'min': min(self.counts),
+            'p5': self.quantile(0.05),
+            'p25': self.quantile(0.25),
+            'median': self.quantile(0.5),
+            'p75': self.quantile(0.75),
+            'p95': self.quantile(0.95),
+            'max': max(self.counts),
+        }
+
+
+class Report:
+    # Distribution of every metric plus the share of each death cause
+    def __init__(self):
+        self.metrics = {metric: Distribution() for metric in METRICS}
+        self.causes = Counter()
+        self.games = 0
+
+    def add(self, row):
+        values = dict(zip(FIELDS, row))
+        for metric, distribution in self.metrics.items():
+            distribution.add(values[metric])
+        self.causes[values['cause']] += 1
+        self.games += 1
+
+    def summary(self):
+        return {
+            'games': self.games,
+            'metrics': {metric: distribution.summary() for metric, distribution in self.metrics.items()},
+            'causes': {cause: self.causes[cause] for cause in CAUSES},
+        }
+
+    def format(self):
+        lines = ['%d games' % self.games,
+                 '%-12s %9s %9s %9s %9s %9s %9s %9s' % ('', 'mean', 'std', 'min', 'p5', 'median', 'p95', 'max')]
+        for metric, distribution in self.metrics.items():
+            stats = distribution.summary()
+            if stats['count']:
+                lines.append('%-12s %9.2f %9.2f %9g %9g %9g %9g %9g' % (
+                    metric, stats['mean'], stats['std'], stats['min'], stats['p5'], stats['median'], stats['p95'],
+                    stats['max']))
+        lines.append('causes       ' + '  '.join(
+            '%s %d (%.1f%%)' % (cause, self.causes[cause], 100 * self.causes[cause] / max(self.games, 1))
+            for cause in CAUSES))
+        return '\n'.join(lines)
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(dict(zip(FIELDS, row))) + '\n' for row in rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    # Rows are buffered into row groups of PARQUET_ROWS; needs pyarrow
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError('pyarrow is needed for Parquet output; write .csv or .jsonl instead') from None
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ('seed', pyarrow.int64()), ('score', pyarrow.int32()), ('food_eaten', pyarrow.int32()),
+            ('size_factor', pyarrow.float32()), ('frames', pyarrow.int32()), ('cause', pyarrow.string()),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= PARQUET_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            columns = list(zip(*self.rows))
+            self.writer.write_table(self.pyarrow.table(
+                {name: list(column) for name, column in zip(FIELDS, columns)}, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {'.csv': CsvWriter, '.jsonl': JsonlWriter, '.parquet': ParquetWriter}
+
+
+def open_writer(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError('unknown output format %r; use %s' % (extension, ', '.join(sorted(WRITERS))))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return WRITERS[extension](path)
+
+
+def seed_chunks(start, stop, size=CHUNK_SEEDS):
+    for first in range(start, stop, size):
+        yield range(first, min(first + size, stop))
+
+
+def evaluate(policy_spec, start, stop, workers=None, max_frames=36000, fps=SIM_RATE,
+             collision_masks=COLLISION_MASKS, output=None, progress=None, courses=False, course_dir=None):
+    # Play seeds start..stop-1 with the policy on every core and return the
+    # Report. Rows go to output as each batch of games finishes, in
+    # completion order. Only QUEUED_CHUNKS tasks per worker are handed out
+    # at a time, so memory does not grow with the number of seeds.
+    # With courses, seed s flies courses.get_course(s) rather than
+    # random.Random(s); course_dir maps the course files written there by
+    # courses.py, so every worker reads the same pages.
+    workers = workers or mp.cpu_count()
+    report = Report()
+    writer = open_writer(output) if output else None
+    chunks = seed_chunks(start, stop)
+    settings = (policy_spec, fps, max_frames, collision_masks, courses, course_dir)
+
+    def collect(rows):
+        for row in rows:
+            report.add(row)
+        if writer:
+            writer.write(rows)
+        if progress:
+            progress(report)
+
+    try:
+        if workers == 1:
+            init_worker(*settings)
+            for chunk in chunks:
+                collect(play_seeds(chunk))
+            return report
+        done = queue.Queue()
+        with mp.Pool(workers, initializer=init_worker, initargs=settings) as pool:
+            pending = 0
+            for chunk in chunks:
+                pool.apply_async(play_seeds, (chunk,), callback=done.put, error_callback=done.put)
+                pending += 1
+                if pending < workers * QUEUED_CHUNKS:
+                    continue
+                rows = done.get()
+                pending -= 1
+                if isinstance(rows, BaseException):
+                    raise rows
+                collect(rows)
+            while pending:
+                rows = done.get()
+                pending -= 1
+                if isinstance(rows, BaseException):
+                    raise rows
+                collect(rows)
+        return report
+    finally:
+        if writer:
+            writer.close()
+
+
+def parse_seeds(text):
+    # START:STOP like range(), or a count N for seeds 0..N-1
+    if ':' in text:
+        start, stop = text.split(':')
+        return int(start or 0), int(stop)
+    return 0, int(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a flap policy headlessly on a range of seeded games')
+    parser.add_argument('policy', help='evolve.py model (.npy/.npz) or module:callable / file.py:callable '
+                                       'taking an engine.Engine and returning whether to flap')
+    parser.add_argument('--seeds', type=parse_seeds, default=(0, 1000), help='START:STOP, or a count (default 1000)')
+    parser.add_argument('--workers', type=int, default=None, help='processes to use (default: every core)')
+    parser.add_argument('--max-frames', type=int, default=36000, help='frames before a game counts as a timeout')
+    parser.add_argument('--fps', type=int, default=SIM_RATE, help='simulation rate the games run at')
+    parser.add_argument('--masks', action='store_true', default=COLLISION_MASKS,
+                        help='collide with the drawn bird and food (see masks.py)')
+    parser.add_argument('--courses', action='store_true', help='fly each seed\'s courses.Course')
+    parser.add_argument('--course-dir', help='directory of course files from courses.py, implies --courses')
+    parser.add_argument('--output', help='per-game results, streamed as .csv, .jsonl or .parquet')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args(argv)
+
+    start, stop = args.seeds
+    began = time.perf_counter()
+    last = [began]
+
+    def progress(report):
+        now = time.perf_counter()
+        if now - last[0] >= 5:
+            last[0] = now
+            print('%d/%d games, %.0f games/s' % (report.games, stop - start, report.games / (now - began)),
+                  file=sys.stderr)
+
+    try:
+        report = evaluate(args.policy, start, stop, args.workers, args.max_frames, args.fps, args.masks,
+                          args.output, progress, args.courses, args.course_dir)
+    except (ValueError, RuntimeError, ImportError, AttributeError) as error:
+        parser.error(str(error))
+    if args.json:
+        print(json.dumps(report.summary(), indent=2))
+    else:
+        print(report.format())
+        print('%.1fs' % (time.perf_counter() - began))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
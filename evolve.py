@@ -0,0 +1,266 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+from batch_engine import BatchEngine, BIRD_X
+from courses import get_course
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, PHYSICS_RATE
+
+# Policy network: features -> tanh hidden layer -> one output, flap if > 0
+INPUTS = 6
+HIDDEN = 8
+GENOME_SIZE = INPUTS * HIDDEN + HIDDEN + HIDDEN + 1
+
+# Fitness weights - surviving a frame is worth 1
+SCORE_FITNESS = 100
+FOOD_FITNESS = 10
+
+
+def unpack(genomes):
+    # Split flat genomes of shape (n, GENOME_SIZE) into layer weights
+    n = len(genomes)
+    end = INPUTS * HIDDEN
+    w1 = genomes[:, :end].reshape(n, INPUTS, HIDDEN)
+    b1 = genomes[:, end:end + HIDDEN]
+    w2 = genomes[:, end + HIDDEN:end + 2 * HIDDEN]
+    b2 = genomes[:, -1]
+    return w1, b1, w2, b2
+
+
+def features(y, vel_y, size_factor, pipe_x, pipe_height, pipe_bottom):
+    # Policy inputs, scaled to roughly [-1, 1]. Works on scalars or arrays.
+    return np.stack(np.broadcast_arrays(
+        y / SCREEN_HEIGHT,
+        vel_y / 10,
+        size_factor - 1,
+        (pipe_x - BIRD_X) / SCREEN_WIDTH,
+        pipe_height / SCREEN_HEIGHT,
+        pipe_bottom / SCREEN_HEIGHT,
+    ), axis=-1)
+
+
+def decide(params, inputs):
+    # Flap decisions for (n, INPUTS) inputs, one network per row
+    w1, b1, w2, b2 = params
+    hidden = np.tanh(np.einsum('ni,nih->nh', inputs, w1) + b1)
+    return np.einsum('nh,nh->n', hidden, w2) + b2 > 0
+
+
+class CourseBatchEngine(BatchEngine):
+    # BatchEngine where the k-th pipe and food of every game come from the
+    # same courses.Course entry
+    def __init__(self, n, course, **kwargs):
+        self.course = course
+        super().__init__(n, **kwargs)
+
+    def _gap_centers(self, numbers):
+        return self.course.gap_centers[numbers - 1]
+
+    def _food_draws(self, numbers):
+        return self.course.food_heights[numbers - 1], self.course.food_types[numbers - 1]
+
+
+def batch_features(batch):
+    # features() for every game, using the first pipe not yet behind the bird
+    games = np.arange(batch.n)
+    ahead = batch.pipe_active & (batch.pipe_x + batch.pipe_width > BIRD_X - batch.collision_half)
+    slot = np.where(ahead, batch.pipe_x, np.inf).argmin(axis=0)
+    found = ahead[slot, games]
+    pipe_x = np.where(found, batch.pipe_x[slot, games], batch.SCREEN_WIDTH)
+    height = np.where(found, batch.pipe_height[slot, games], 0)
+    bottom = np.where(found, batch.pipe_bottom[slot, games], batch.SCREEN_HEIGHT - batch.GROUND_HEIGHT)
+    return features(batch.y, batch.vel_y, batch.size_factor, pipe_x, height, bottom)
+
+
+def engine_features(engine):
+    # features() for a single engine.Engine, same pipe choice as batch_features
+    bird = engine.bird
+    bird_left = bird.x - bird.collision_width // 2
+    pipe_x = engine.SCREEN_WIDTH
+    height = 0
+    bottom = engine.SCREEN_HEIGHT - engine.GROUND_HEIGHT
+    for pipe in engine.pipes:
+        if pipe.x + pipe.width > bird_left:
+            pipe_x, height, bottom = pipe.x, pipe.height, pipe.bottom
+            break
+    return features(bird.y, bird.vel_y, bird.size_factor, pipe_x, height, bottom)
+
+
+def load_genome(path):
+    # The genome of a champion (.npy) or the best of a checkpoint (.npz)
+    data = np.load(path)
+    return data['best_genome'] if path.endswith('.npz') else data
+
+
+def genome_policy(path):
+    # policy(engine) -> flap flying a champion (.npy) or checkpoint (.npz)
+    params = unpack(np.asarray(load_genome(path), dtype=float).reshape(1, GENOME_SIZE))
+    return lambda engine: bool(decide(params, engine_features(engine)[None])[0])
+
+
+def evaluate(genomes, course_seed, max_frames):
+    # Play every genome once on the course. Returns (fitness, score, frames).
+    course = get_course(course_seed)
+    batch = CourseBatchEngine(len(genomes), course)
+    params = unpack(genomes)
+    frames = np.zeros(len(genomes), dtype=np.int64)
+    for _ in range(max_frames):
+        over = batch.step(decide(params, batch_features(batch)))
+        frames += ~over
+        if over.all():
+            break
+    fitness = frames + SCORE_FITNESS * batch.score + FOOD_FITNESS * batch.food_count
+    return fitness, batch.score.copy(), frames
+
+
+class Evolution:
+    # Truncation selection with elitism and Gaussian mutation. Each
+    # generation is evaluated on fresh shared courses.
+    def __init__(self, population=1000, seed=0, elite=0.02, parents=0.2, mutation_rate=0.2,
+                 mutation_scale=0.4, max_frames=3600, courses=1):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.genomes = self.rng.normal(0, 1, (population, GENOME_SIZE))
+        self.elite = elite
+        self.parents = parents
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
+        self.max_frames = max_frames
+        # Courses flown per generation; fitness is the mean over them, which
+        # favours policies that do not just fit one sequence of gaps
+        self.courses = courses
+        self.generation = 0
+        self.best_genome = self.genomes[0].copy()
+        self.best_fitness = -np.inf
+
+    def course_seeds(self):
+        sequence = np.random.SeedSequence([self.seed, self.generation])
+        return [int(seed) for seed in sequence.generate_state(self.courses)]
+
+    def evaluate(self, pool=None, workers=1):
+        # Mean (fitness, score, frames) of every genome over this
+        # generation's courses, with the population split across workers
+        chunks = [chunk for chunk in np.array_split(self.genomes, workers) if len(chunk)]
+        args = [(chunk, seed, self.max_frames) for seed in self.course_seeds() for chunk in chunks]
+        results = pool.starmap(evaluate, args) if pool else [evaluate(*arg) for arg in args]
+        per_course = [
+            [np.concatenate(parts) for parts in zip(*results[i:i + len(chunks)])]
+            for i in range(0, len(results), len(chunks))
+        ]
+        return tuple(np.mean(values, axis=0) for values in zip(*per_course))
+
+    def step(self, pool=None, workers=1):
+        # Evaluate the current population and breed the next one.
+        # Returns (fitness, score, frames) of the evaluated population.
+        fitness, score, frames = self.evaluate(pool, workers)
+        order = np.argsort(fitness)[::-1]
+        if fitness[order[0]] >= self.best_fitness:
+            self.best_fitness = fitness[order[0]]
+            self.best_genome = self.genomes[order[0]].copy()
+
+        n = len(self.genomes)
+        elite = self.genomes[order[:max(1, int(n * self.elite))]]
+        parents = self.genomes[order[:max(1, int(n * self.parents))]]
+        children = parents[self.rng.integers(0, len(parents), n - len(elite))]
+        mutate = self.rng.random(children.shape) < self.mutation_rate
+        children += mutate * self.rng.normal(0, self.mutation_scale, children.shape)
+        self.genomes = np.concatenate((elite, children))
+        self.generation += 1
+        return fitness, score, frames
+
+    def save(self, path):
+        np.savez(path, genomes=self.genomes, generation=self.generation, seed=self.seed,
+                 best_genome=self.best_genome, best_fitness=self.best_fitness,
+                 settings=np.array([self.elite, self.parents, self.mutation_rate, self.mutation_scale,
+                                    self.max_frames, self.courses]))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        elite, parents, rate, scale, max_frames, courses = data['settings']
+        evolution = cls(len(data['genomes']), int(data['seed']), elite, parents, rate, scale, int(max_frames),
+                        int(courses))
+        evolution.genomes = data['genomes']
+        evolution.generation = int(data['generation'])
+        evolution.best_genome = data['best_genome']
+        evolution.best_fitness = float(data['best_fitness'])
+        # Continue with a random stream of its own rather than replaying the first run's
+        evolution.rng = np.random.default_rng([evolution.seed, evolution.generation])
+        return evolution
+
+
+def train(evolution, generations, workers=None, checkpoint_dir=None):
+    workers = workers or mp.cpu_count()
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    with mp.Pool(workers) as pool:
+        for _ in range(generations):
+            start = time.perf_counter()
+            fitness, score, frames = evolution.step(pool, workers)
+            print('gen %4d  best %8.0f  score max %6.1f mean %6.2f  frames mean %7.1f  %.2fs' % (
+                evolution.generation, fitness.max(), score.max(), score.mean(), frames.mean(),
+                time.perf_counter() - start))
+            if checkpoint_dir:
+                evolution.save(os.path.join(checkpoint_dir, 'latest.npz'))
+                np.save(os.path.join(checkpoint_dir, 'champion.npy'), evolution.best_genome)
+    return evolution
+
+
+def watch(genome, seed=None):
+    # Fly a genome in the game window, restarting after each game over
+    import pygame
+    import main
+    from engine import Engine
+    from session import PLAYING, GAME_OVER
+
+    params = unpack(np.asarray(genome, dtype=float).reshape(1, GENOME_SIZE))
+    main.bootstrap()
+    # Policies are trained at the physics tuning rate, so watch at that rate too
+    engine = Engine(screen=main.screen, fps=PHYSICS_RATE)
+    engine.reset(seed=seed)
+    over_frames = 0
+    while True:
+        main.clock.tick(PHYSICS_RATE)
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+        flap = bool(decide(params, engine_features(engine)[None])[0])
+        if engine.step(flap):
+            over_frames += 1
+            if over_frames > PHYSICS_RATE:
+                over_frames = 0
+                engine.reset(seed=None if seed is None else seed + engine.score + 1)
+        main.draw_frame(engine, GAME_OVER if engine.game_over else PLAYING)
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evolve flap policies')
+    commands = parser.add_subparsers(dest='command', required=True)
+    parser_train = commands.add_parser('train')
+    parser_train.add_argument('--population', type=int, default=1000)
+    parser_train.add_argument('--generations', type=int, default=50)
+    parser_train.add_argument('--workers', type=int, default=None)
+    parser_train.add_argument('--max-frames', type=int, default=3600)
+    parser_train.add_argument('--seed', type=int, default=0)
+    parser_train.add_argument('--courses', type=int, default=1, help='shared courses flown per generation')
+    parser_train.add_argument('--checkpoint-dir', default='checkpoints')
+    parser_train.add_argument('--resume', help='checkpoint .npz to continue from')
+    parser_watch = commands.add_parser('watch')
+    parser_watch.add_argument('path', help='champion .npy or checkpoint .npz')
+    parser_watch.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'train':
+        if args.resume:
+            evolution = Evolution.load(args.resume)
+        else:
+            evolution = Evolution(args.population, args.seed, max_frames=args.max_frames, courses=args.courses)
+        train(evolution, args.generations, args.workers, args.checkpoint_dir)
+    else:
+        watch(load_genome(args.path), args.seed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import os
+import json
+import pygame
+
+# Font files found for each requested name are cached on disk. Finding a
+# system font the first time makes pygame scan every installed font (via
+# fontconfig on Linux), which takes hundreds of ms; later starts read the
+# path from the cache instead. FLAPPY_CACHE_DIR moves the cache.
+CACHE_DIR = os.environ.get('FLAPPY_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'flappy_bird')
+FONT_CACHE = os.path.join(CACHE_DIR, 'fonts.json')
+
+_paths = None
+
+
+def _load_cache():
+    global _paths
+    if _paths is None:
+        try:
+            with open(FONT_CACHE) as f:
+                _paths = json.load(f)
+        except (OSError, ValueError):
+            _paths = {}
+    return _paths
+
+
+def font_path(name):
+    # File pygame.font.SysFont(name) would load, or None for pygame's
+    # default font when no such system font exists
+    paths = _load_cache()
+    if name in paths and (paths[name] is None or os.path.exists(paths[name])):
+        return paths[name]
+    path = pygame.font.match_font(name)
+    paths[name] = path
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(FONT_CACHE, 'w') as f:
+            json.dump(paths, f)
+    except OSError:
+        # An unwritable cache only costs the scan on the next start
+        pass
+    return path
+
+
+def load_font(name, size):
+    # Same font as pygame.font.SysFont(name, size), without the font scan
+    # once the path is cached
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font(font_path(name), size)
@@ -2,69 +2,89 @@ import pygame
 import random
 
 class Food:
-    def __init__(self, x, y, game_speed=3):
+    # Width and height of every food item
+    SIZE = 20
+    COLORS = {
+        "seed": (240, 230, 140),  # Khaki
+        "worm": (255, 105, 180),  # Hot Pink
+        "berry": (65, 105, 225)  # Royal Blue
+    }
+
+    def __init__(self, x, y, game_speed=3, rng=None, food_type=None):
         self.x = x
         self.y = y
-        self.width = 20
-        self.height = 20
+        self.width = self.SIZE
+        self.height = self.SIZE
         self.speed = game_speed * 1.5  # Food moves faster than pipes
         self.active = True
-        self.food_type = random.choice(["seed", "worm", "berry"])
-        self.color = {
-            "seed": (240, 230, 140),  # Khaki
-            "worm": (255, 105, 180),  # Hot Pink
-            "berry": (65, 105, 225)  # Royal Blue
-        }[self.food_type]
+        # Drawn at random unless given, e.g. by a courses.Course
+        if food_type is None:
+            food_type = (rng or random).choice(["seed", "worm", "berry"])
+        self.food_type = food_type
+        self.color = self.COLORS[self.food_type]
+
+    def snapshot(self):
+        return self.x, self.y, self.speed, self.active, self.food_type
+
+    @classmethod
+    def restored(cls, state):
+        # Food from snapshot() state, built without drawing a food type
+        food = cls.__new__(cls)
+        food.x, food.y, food.speed, food.active, food.food_type = state
+        food.width = food.height = cls.SIZE
+        food.color = cls.COLORS[food.food_type]
+        return food
 
     def update(self):
         self.x -= self.speed
         # Return True if still on screen
         return self.x > -self.width
 
-    def draw(self, screen):
+    def draw(self, screen, x=None, highlights=True):
+        # x overrides the food's position, e.g. when rendering between updates.
+        # highlights=False skips the berry's highlight.
+        if x is None:
+            x = self.x
+
         if self.food_type == "seed":
             # Draw a seed
-            pygame.draw.ellipse(screen, self.color, (self.x, self.y, self.width, self.height))
-            pygame.draw.line(screen, (139, 69, 19), (self.x + self.width // 2, self.y - 5),
-                             (self.x + self.width // 2 + 5, self.y - 10), 2)
+            rect = pygame.draw.ellipse(screen, self.color, (x, self.y, self.width, self.height))
+            rect.union_ip(pygame.draw.line(screen, (139, 69, 19), (x + self.width // 2, self.y - 5),
+                                           (x + self.width // 2 + 5, self.y - 10), 2))
 
         elif self.food_type == "worm":
             # Draw a worm
+            rect = pygame.Rect(x, self.y, self.width, self.height)
             for i in range(3):
                 offset = i * (self.width // 3)
-                pygame.draw.circle(screen, self.color,
-                                  (self.x + offset + self.width // 6, self.y + self.height // 2),
-                                  self.width // 6)
+                rect.union_ip(pygame.draw.circle(screen, self.color,
+                                                 (x + offset + self.width // 6, self.y + self.height // 2),
+                                                 self.width // 6))
             # Worm eyes
             pygame.draw.circle(screen, (0, 0, 0),
-                              (self.x + 5, self.y + self.height // 2 - 2), 2)
+                              (x + 5, self.y + self.height // 2 - 2), 2)
 
         elif self.food_type == "berry":
             # Draw a berry
-            pygame.draw.circle(screen, self.color,
-                              (self.x + self.width // 2, self.y + self.height // 2),
+            rect = pygame.draw.circle(screen, self.color,
+                              (x + self.width // 2, self.y + self.height // 2),
                               self.width // 2)
             # Berry stem
-            pygame.draw.line(screen, (0, 100, 0),
-                             (self.x + self.width // 2, self.y),
-                             (self.x + self.width // 2, self.y - 5), 2)
+            rect.union_ip(pygame.draw.line(screen, (0, 100, 0),
+                                           (x + self.width // 2, self.y),
+                                           (x + self.width // 2, self.y - 5), 2))
             # Berry highlight
-            pygame.draw.circle(screen, (255, 255, 255),
-                              (self.x + self.width // 3, self.y + self.height // 3), 3)
+            if highlights:
+                pygame.draw.circle(screen, (255, 255, 255),
+                                  (x + self.width // 3, self.y + self.height // 3), 3)
 
-    def collide(self, bird):
-        # Create rectangles for collision detection
-        food_rect = pygame.Rect(self.x, self.y, self.width, self.height)
-
-        # Use the bird's collision rectangle if available, otherwise create one
-        if hasattr(bird, 'get_collision_rect'):
-            bird_rect = bird.get_collision_rect()
-        else:
-            bird_rect = pygame.Rect(
-                bird.x - bird.collision_width // 2,
-                bird.y - bird.collision_height // 2,
-                bird.collision_width,
-                bird.collision_height
-            )
+        # Area touched on screen, for dirty-rect rendering
+        return rect
 
-        return food_rect.colliderect(bird_rect)
\ No newline at end of file
+    def collide(self, bird):
+        # Rect overlap test between the food and the bird's collision box,
+        # on integer coordinates like pygame.Rect
+        left, top, right, bottom = bird.collision_bounds()
+        x = int(self.x)
+        y = int(self.y)
+        return x < right and x + self.width > left and y < bottom and y + self.height > top
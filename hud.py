@@ -0,0 +1,109 @@
+import pygame
+from settings import WHITE
+
+# Characters pre-rendered for numbers, including the size readout ('1.2x')
+ATLAS_CHARACTERS = '0123456789.-x'
+
+
+class TextCache:
+    # Rendered text surfaces keyed by (text, color), so strings that do not
+    # change are only rasterized once
+    def __init__(self, font, max_entries=256):
+        self.font = font
+        self.max_entries = max_entries
+        self.surfaces = {}
+
+    def render(self, text, color=WHITE):
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            # Values that never repeat (e.g. a long run of scores) must not
+            # grow the cache forever
+            if len(self.surfaces) >= self.max_entries:
+                self.surfaces.clear()
+            surface = self.surfaces[key] = self.font.render(text, True, color)
+        return surface
+
+
+class DigitAtlas:
+    # One pre-rendered glyph per character, so changing numbers are built by
+    # blitting glyphs instead of running the TTF rasterizer
+    def __init__(self, font, color=WHITE, characters=ATLAS_CHARACTERS):
+        self.glyphs = {}
+        for char in characters:
+            self.glyphs[char] = (font.render(char, True, color), font.size(char)[0])
+        self.height = font.get_height()
+
+    def width(self, text):
+        return sum(self.glyphs[char][1] for char in text)
+
+    def draw(self, surface, text, pos):
+        # Returns the area drawn, like Surface.blit
+        x, y = pos
+        start = x
+        for char in text:
+            glyph, advance = self.glyphs[char]
+            surface.blit(glyph, (x, y))
+            x += advance
+        return pygame.Rect(start, y, x - start, self.height)
+
+
+class Hud:
+    # Score, food and size readouts plus the game over text. Each readout is
+    # composed into one surface from the cached label and the digit glyphs,
+    # and only rebuilt when its value changes.
+    def __init__(self, font, color=WHITE):
+        self.font = font
+        self.color = color
+        self.text = TextCache(font)
+        self.digits = DigitAtlas(font, color)
+        self.lines = {}
+
+    def compose(self, label, value):
+        label_width = self.font.size(label)[0]
+        width = label_width + self.digits.width(value)
+        surface = pygame.Surface((width, self.font.get_height()), pygame.SRCALPHA)
+        # Transparent pixels carry the text color so glyph edges blend cleanly
+        surface.fill(self.color + (0,))
+        surface.blit(self.text.render(label, self.color), (0, 0))
+        self.digits.draw(surface, value, (label_width, 0))
+        return surface
+
+    def line(self, label, value):
+        value = str(value)
+        cached = self.lines.get(label)
+        if cached is None or cached[0] != value:
+            cached = self.lines[label] = (value, self.compose(label, value))
+        return cached[1]
+
+    def draw_value(self, screen, label, value, pos):
+        return screen.blit(self.line(label, value), pos)
+
+    def draw_centered_value(self, screen, label, value, center_x, y):
+        surface = self.line(label, value)
+        return screen.blit(surface, (center_x - surface.get_width() // 2, y))
+
+    def draw_centered(self, screen, text, center_x, y):
+        surface = self.text.render(text, self.color)
+        return screen.blit(surface, (center_x - surface.get_width() // 2, y))
+
+    def draw_stats(self, screen, score, food_count, size_factor):
+        return [
+            self.draw_value(screen, 'Score: ', score, (10, 10)),
+            self.draw_value(screen, 'Food: ', food_count, (10, 50)),
+            self.draw_value(screen, 'Size: ', f'{size_factor:.1f}x', (10, 90)),
+        ]
+
+    def draw_game_over(self, screen, score):
+        center_x = screen.get_width() // 2
+        center_y = screen.get_height() // 2
+        return [
+            self.draw_centered(screen, 'Game Over!', center_x, center_y - 50),
+            self.draw_centered(screen, 'Press R to Restart', center_x, center_y),
+            self.draw_centered_value(screen, 'Final Score: ', score, center_x, center_y + 50),
+        ]
+
+    def draw_attract(self, screen):
+        center_x = screen.get_width() // 2
+        center_y = screen.get_height() // 2
+        return [self.draw_centered(screen, 'Press SPACE to Start', center_x, center_y)]
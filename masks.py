@@ -0,0 +1,136 @@
+import pygame
+from bird import render_bird
+from food import Food
+
+# Pixel masks of the bird and food as drawn, for collisions that follow
+# the sprites instead of the bird's square collision box. Masks are built
+# once and shared by every engine: the bird's for each size it can reach
+# and each wing position, the food's for each food type. A collision test
+# first compares bounding boxes, which rules out nearly every pair, and
+# only calls mask.overlap when the boxes meet.
+
+# (size_factor, wing_up) -> (mask, offset_x, offset_y, box). The mask is
+# placed like the sprite, with the bird's centre at (offset_x, offset_y);
+# box is (left, top, right, bottom) of its set pixels relative to that
+# centre.
+_bird_masks = {}
+
+# food_type -> (mask, offset_y, box), the mask placed at (x, y - offset_y)
+# for food at (x, y), box relative to (x, y)
+_food_masks = {}
+
+# Solid masks by (width, height), for testing rects against masks
+_filled_masks = {}
+
+# Room above food for the seed and berry stems
+FOOD_PADDING = 10
+
+
+def mask_entry(surface, offset_x, offset_y):
+    mask = pygame.mask.from_surface(surface)
+    rects = mask.get_bounding_rects()
+    if rects:
+        box = rects[0].unionall(rects[1:])
+        box = (box.left - offset_x, box.top - offset_y, box.right - offset_x, box.bottom - offset_y)
+    else:
+        box = (0, 0, 0, 0)
+    return mask, offset_x, offset_y, box
+
+
+def build_bird_mask(size_factor, wing_up):
+    # Mask of the bird as Bird.draw shows it in flight. The flattened beak
+    # only appears once the bird has hit something, and the legs only
+    # while it bounces off the ground, so neither takes part.
+    surface, offset_x, offset_y = render_bird(size_factor, wing_up, False, False)
+    entry = _bird_masks[(size_factor, wing_up)] = mask_entry(surface, offset_x, offset_y)
+    return entry
+
+
+def build_bird_masks(max_size_factor=2.0, size_increase=0.1):
+    # Every size the bird can grow to, stepped exactly like Bird.eat_food
+    # so the keys are the size_factor values the bird will hold
+    size_factor = 1.0
+    while True:
+        for wing_up in (False, True):
+            if (size_factor, wing_up) not in _bird_masks:
+                build_bird_mask(size_factor, wing_up)
+        if size_factor >= max_size_factor:
+            break
+        size_factor = min(size_factor + size_increase, max_size_factor)
+
+
+def bird_mask(bird):
+    entry = _bird_masks.get((bird.size_factor, bird.wing_up))
+    if entry is None:
+        entry = build_bird_mask(bird.size_factor, bird.wing_up)
+    return entry
+
+
+def build_food_masks():
+    for food_type in Food.COLORS:
+        surface = pygame.Surface((Food.SIZE + 2, Food.SIZE + FOOD_PADDING + 2), pygame.SRCALPHA)
+        Food.restored((0, FOOD_PADDING, 0, True, food_type)).draw(surface)
+        mask, _, offset_y, box = mask_entry(surface, 0, FOOD_PADDING)
+        _food_masks[food_type] = (mask, offset_y, box)
+
+
+def filled_mask(width, height):
+    mask = _filled_masks.get((width, height))
+    if mask is None:
+        mask = _filled_masks[(width, height)] = pygame.Mask((width, height), fill=True)
+    return mask
+
+
+def build_masks(max_size_factor=2.0, size_increase=0.1):
+    # Build every mask up front, so no game pays for it mid-frame
+    build_bird_masks(max_size_factor, size_increase)
+    if not _food_masks:
+        build_food_masks()
+
+
+def bird_reach(max_size_factor=2.0, size_increase=0.1):
+    # Furthest any bird mask reaches left or right of the bird's centre
+    build_bird_masks(max_size_factor, size_increase)
+    return max(max(-box[0], box[2]) for _, _, _, box in _bird_masks.values())
+
+
+def overlaps_rect(bird, entry, left, top, right, bottom):
+    # Whether the bird's mask has a set pixel inside the rect [left, right)
+    # x [top, bottom). The rect is clipped to the mask's box first, so only
+    # an overlapping corner is compared.
+    mask, offset_x, offset_y, box = entry
+    x = int(bird.x)
+    y = int(bird.y)
+    left = max(left, x + box[0])
+    right = min(right, x + box[2])
+    if left >= right:
+        return False
+    top = max(top, y + box[1])
+    bottom = min(bottom, y + box[3])
+    if top >= bottom:
+        return False
+    return mask.overlap(filled_mask(right - left, bottom - top),
+                        (left - x + offset_x, top - y + offset_y)) is not None
+
+
+def collide_pipe(pipe, bird):
+    # Mask version of Pipe.collide: the same top and bottom pipe rects,
+    # tested against the drawn bird
+    entry = bird_mask(bird)
+    x = int(pipe.x)
+    return (overlaps_rect(bird, entry, x, 0, x + pipe.width, pipe.top_end) or
+            overlaps_rect(bird, entry, x, pipe.bottom_start, x + pipe.width, pipe.bottom_end))
+
+
+def collide_food(food, bird):
+    # Mask version of Food.collide: the drawn bird against the drawn food
+    mask, offset_x, offset_y, box = bird_mask(bird)
+    food_mask, food_offset, food_box = _food_masks[food.food_type]
+    x = int(bird.x)
+    y = int(bird.y)
+    food_x = int(food.x)
+    food_y = int(food.y)
+    if (food_x + food_box[0] >= x + box[2] or food_x + food_box[2] <= x + box[0] or
+            food_y + food_box[1] >= y + box[3] or food_y + food_box[3] <= y + box[1]):
+        return False
+    return mask.overlap(food_mask, (food_x - x + offset_x, food_y - food_offset - y + offset_y)) is not None
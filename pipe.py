@@ -1,33 +1,65 @@
 import pygame
 import random
 
+# Pipe body and cap surfaces, built once per screen size and shared by all pipes
+_assets = {}
+
+# Randomness for pipes whose gap is overwritten right away, see PipePool.restore
+_scratch_rng = random.Random(0)
+
+
+def pipe_assets(screen_width, screen_height):
+    key = (screen_width, screen_height)
+    if key not in _assets:
+        body = pygame.Surface((screen_width // 10, screen_height))
+        body.fill((0, 128, 0))  # GREEN
+        cap = pygame.Surface((int(screen_width // 8), 20))
+        cap.fill((0, 100, 0))
+        if pygame.display.get_surface() is not None:
+            body = body.convert()
+            cap = cap.convert()
+        _assets[key] = (body, cap)
+    return _assets[key]
+
+
 class Pipe:
-    def __init__(self, x, score_count, total_pipes, screen_width, screen_height, ground_height, game_speed):
-        self.x = x
-        self.height = 0
-        self.top = 0
-        self.bottom = 0
+    def __init__(self, x, score_count, total_pipes, screen_width, screen_height, ground_height, game_speed, rng=None,
+                 gap_center=None):
         self.SCREEN_WIDTH = screen_width
         self.SCREEN_HEIGHT = screen_height
         self.GROUND_HEIGHT = ground_height
         self.GAME_SPEED = game_speed
-        self.PIPE_TOP = pygame.Surface((screen_width // 10, screen_height))
-        self.PIPE_TOP.fill((0, 128, 0))  # GREEN
-        self.PIPE_BOTTOM = pygame.Surface((screen_width // 10, screen_height))
-        self.PIPE_BOTTOM.fill((0, 128, 0))  # GREEN
-        self.passed = False
+        # Shared surfaces - never drawn on, so every pipe can use the same ones
+        self.PIPE_TOP, self.PIPE_CAP = pipe_assets(screen_width, screen_height)
+        self.PIPE_BOTTOM = self.PIPE_TOP
+        self.width = self.PIPE_TOP.get_width()
 
         # Calculate gap size parameters
         self.PIPE_GAP_START = 400  # Starting gap size
         self.PIPE_GAP_MIN = 250    # Minimum gap size
 
+        self.reset(x, total_pipes, rng, gap_center)
+
+    def reset(self, x, total_pipes, rng=None, gap_center=None):
+        # Put the pipe back at x with a fresh gap, so PipePool can reuse it.
+        # gap_center places the gap instead of drawing it, e.g. from a
+        # courses.Course.
+        self.x = x
+        # Source of randomness for the gap position - the global random
+        # module unless a seeded random.Random is supplied
+        self.rng = rng or random
+        self.height = 0
+        self.top = 0
+        self.bottom = 0
+        self.passed = False
+
         # Calculate the current gap size based on how many pipes have been generated
         progress = min(1.0, total_pipes / 50)  # Reaches minimum after 50 pipes
         self.gap = self.PIPE_GAP_START - (self.PIPE_GAP_START - self.PIPE_GAP_MIN) * progress
 
-        self.set_height()
+        self.set_height(gap_center)
 
-    def set_height(self):
+    def set_height(self, gap_center=None):
         # Create a true random height between 20% and 80% of usable screen space
         usable_height = self.SCREEN_HEIGHT - self.GROUND_HEIGHT
 
@@ -35,10 +67,11 @@ class Pipe:
         max_pipe_height = usable_height - self.gap
 
         # Choose a random position for the gap center point
-        gap_center = random.randint(
-            int(usable_height * 0.2),  # Not too close to the top
-            int(usable_height * 0.8)  # Not too close to the ground
-        )
+        if gap_center is None:
+            gap_center = self.rng.randint(
+                int(usable_height * 0.2),  # Not too close to the top
+                int(usable_height * 0.8)  # Not too close to the ground
+            )
 
         # Calculate top and bottom pipe positions based on the gap center
         self.height = gap_center - (self.gap // 2)
@@ -58,47 +91,95 @@ class Pipe:
             self.top += shift
             self.bottom += shift
 
+        self.set_extents()
+
+    def set_extents(self):
+        # Collision extents truncated to integers like pygame.Rect. A part
+        # with no height can never be hit, which an end of -inf encodes.
+        top_end = int(self.height)
+        self.top_end = top_end if top_end > 0 else float('-inf')
+        bottom_height = int(self.SCREEN_HEIGHT - self.GROUND_HEIGHT - self.bottom)
+        self.bottom_start = int(self.bottom)
+        self.bottom_end = self.bottom_start + bottom_height if bottom_height > 0 else float('-inf')
+
+    def snapshot(self):
+        return (self.x, self.passed, self.gap, self.height, self.top, self.bottom, self.top_end, self.bottom_start,
+                self.bottom_end)
+
+    def restore(self, state):
+        # Put back a snapshot() without drawing a new gap
+        (self.x, self.passed, self.gap, self.height, self.top, self.bottom, self.top_end, self.bottom_start,
+         self.bottom_end) = state
+
     def update(self):
         self.x -= self.GAME_SPEED
         return self.x > -self.PIPE_TOP.get_width()
 
-    def draw(self, screen):
+    def draw(self, screen, x=None):
+        # x overrides the pipe's position, e.g. when rendering between updates
+        if x is None:
+            x = self.x
+
         # Draw pipe bodies
-        screen.blit(self.PIPE_TOP, (self.x, self.top))
-        screen.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
+        rect = screen.blit(self.PIPE_TOP, (x, self.top))
+        rect.union_ip(screen.blit(self.PIPE_BOTTOM, (x, self.bottom)))
 
         # Draw pipe caps
-        cap_width = int(self.SCREEN_WIDTH // 8)
-        cap_height = 20
+        cap_height = self.PIPE_CAP.get_height()
 
         # Top pipe cap
-        pygame.draw.rect(screen, (0, 100, 0), (
-            self.x - 5,
-            self.height - cap_height,
-            cap_width,
-            cap_height
-        ))
+        rect.union_ip(screen.blit(self.PIPE_CAP, (x - 5, self.height - cap_height)))
 
         # Bottom pipe cap
-        pygame.draw.rect(screen, (0, 100, 0), (
-            self.x - 5,
-            self.bottom,
-            cap_width,
-            cap_height
-        ))
+        rect.union_ip(screen.blit(self.PIPE_CAP, (x - 5, self.bottom)))
+
+        # Area touched on screen, for dirty-rect rendering
+        return rect
 
     def collide(self, bird):
-        # Get collision rectangles - only for visible parts of pipes
-        bird_rect = bird.get_collision_rect()
-        
-        # Top pipe: only the part from y=0 to self.height (visible part)
-        if self.height > 0:
-            top_pipe = pygame.Rect(self.x, 0, self.PIPE_TOP.get_width(), self.height)
-        else:
-            top_pipe = pygame.Rect(0, 0, 0, 0)  # No visible top pipe
-            
-        # Bottom pipe: from self.bottom to screen bottom
-        bottom_pipe = pygame.Rect(self.x, self.bottom, self.PIPE_BOTTOM.get_width(), 
-                                 self.SCREEN_HEIGHT - self.GROUND_HEIGHT - self.bottom)
-
-        return bird_rect.colliderect(top_pipe) or bird_rect.colliderect(bottom_pipe)
\ No newline at end of file
+        # Same result as testing the bird's collision rect against Rects for
+        # the visible top pipe (y=0 to height) and bottom pipe (bottom to the
+        # ground), without building any Rects
+        left, top, right, bottom = bird.collision_bounds()
+        x = int(self.x)
+        if x >= right or x + self.width <= left:
+            return False
+        return (top < self.top_end and bottom > 0) or (top < self.bottom_end and bottom > self.bottom_start)
+
+
+class PipePool:
+    # Recycles pipes that scrolled off screen instead of building new ones
+    def __init__(self, screen_width, screen_height, ground_height, game_speed):
+        self.SCREEN_WIDTH = screen_width
+        self.SCREEN_HEIGHT = screen_height
+        self.GROUND_HEIGHT = ground_height
+        self.GAME_SPEED = game_speed
+        self.free = []
+
+    def acquire(self, x, score_count, total_pipes, rng=None, gap_center=None):
+        if self.free:
+            pipe = self.free.pop()
+            pipe.reset(x, total_pipes, rng, gap_center)
+            return pipe
+        return Pipe(
+            x=x,
+            score_count=score_count,
+            total_pipes=total_pipes,
+            screen_width=self.SCREEN_WIDTH,
+            screen_height=self.SCREEN_HEIGHT,
+            ground_height=self.GROUND_HEIGHT,
+            game_speed=self.GAME_SPEED,
+            rng=rng,
+            gap_center=gap_center
+        )
+
+    def restore(self, state):
+        # A pipe put back from Pipe.snapshot() state. A pipe built here only
+        # to be overwritten draws its throwaway gap from _scratch_rng, so
+        # restoring never touches the game's random stream.
+        pipe = self.free.pop() if self.free else self.acquire(0, 0, 0, _scratch_rng)
+        pipe.restore(state)
+        return pipe
+
+    def release(self, pipe):
+        self.free.append(pipe)
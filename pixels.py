@@ -0,0 +1,190 @@
+import math
+import numpy as np
+from batch_engine import FOOD_SIZE, FOOD_TYPES, MAX_SIZE_FACTOR, BASE_COLLISION_SIZE
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, SKY_BLUE, GREEN, BROWN, YELLOW
+from food import Food
+
+OBS_WIDTH = 84
+OBS_HEIGHT = 84
+STACK_FRAMES = 4
+
+
+def gray(color):
+    # ITU-R 601 luma of an RGB color, as drawn into observations
+    r, g, b = color[:3]
+    return int(round(0.299 * r + 0.587 * g + 0.114 * b))
+
+
+# Gray levels of everything drawn into an observation
+SKY_GRAY = gray(SKY_BLUE)
+GROUND_GRAY = gray(BROWN)
+PIPE_GRAY = gray(GREEN)
+BIRD_GRAY = gray(YELLOW)
+FOOD_GRAYS = np.array([gray(Food.COLORS[food_type]) for food_type in FOOD_TYPES], dtype=np.uint8)
+
+
+class PixelRenderer:
+    # Draws the game as a small grayscale image straight into uint8 arrays,
+    # without a full-size frame in between. Every shape is the collision
+    # rect the game tests - pipe parts as in Pipe.collide, the bird's
+    # get_collision_rect(), food as in Food.collide - scaled to the grid
+    # with edges rounded to the nearest cell. A rect on screen always covers
+    # at least one cell, so nothing the bird can hit disappears.
+    def __init__(self, width=OBS_WIDTH, height=OBS_HEIGHT, screen_width=SCREEN_WIDTH,
+                 screen_height=SCREEN_HEIGHT, ground_height=GROUND_HEIGHT):
+        self.width = width
+        self.height = height
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.pipe_width = screen_width // 10
+        # Cell edge for every whole screen coordinate
+        self.col_edges = np.rint(np.arange(screen_width + 1) * (width / screen_width)).astype(np.intp)
+        self.row_edges = np.rint(np.arange(screen_height + 1) * (height / screen_height)).astype(np.intp)
+        self.cols = np.arange(width)
+        # Row numbers in the narrowest type that holds them, which keeps the
+        # per-pixel pipe test cheap
+        self.row_dtype = np.uint8 if height < 255 else np.uint16
+        self.rows = np.arange(height, dtype=self.row_dtype)[:, None]
+        # Sky with the ground band, copied in before anything else is drawn
+        self.ground_row = self.row_edges[screen_height - ground_height]
+        self.backdrop = np.full((height, width), SKY_GRAY, dtype=np.uint8)
+        self.backdrop[self.ground_row:] = GROUND_GRAY
+        # Largest number of cells a food item or the bird can cover per axis
+        self.food_span = (self.span(FOOD_SIZE, width / screen_width), self.span(FOOD_SIZE, height / screen_height))
+        bird = int(BASE_COLLISION_SIZE * MAX_SIZE_FACTOR)
+        self.bird_span = (self.span(bird, width / screen_width), self.span(bird, height / screen_height))
+
+    @staticmethod
+    def span(size, scale):
+        return math.ceil(size * scale) + 1
+
+    def cells(self, low, high, edges, count):
+        # Cell range [first, end) covered by screen range [low, high)
+        limit = len(edges) - 1
+        low = np.clip(low, 0, limit)
+        high = np.clip(high, 0, limit)
+        first = np.minimum(edges[low.astype(np.intp)], count - 1)
+        end = edges[high.astype(np.intp)]
+        return first, np.where(high > low, np.maximum(end, first + 1), first)
+
+    def render(self, out, pipes, foods, bird):
+        # out has shape (games, height, width). pipes is (left, top_end,
+        # bottom_start, bottom_end, valid), foods (left, top, type, valid),
+        # each a tuple of (slots, games) arrays; bird is (left, top, size)
+        # arrays of shape (games,). Returns out. Layers go in the game's
+        # draw order: pipes, food, bird, then the ground over everything.
+        out[:] = self.backdrop
+        self.draw_pipes(out, *pipes)
+        food_left, food_top, food_type, food_valid = foods
+        for k in range(len(food_left)):
+            self.fill_rects(out, food_left[k], food_top[k], food_left[k] + FOOD_SIZE, food_top[k] + FOOD_SIZE,
+                            food_valid[k], FOOD_GRAYS[food_type[k]], self.food_span)
+        left, top, size = bird
+        self.fill_rects(out, left, top, left + size, top + size, None, BIRD_GRAY, self.bird_span)
+        out[:, self.ground_row:] = GROUND_GRAY
+        return out
+
+    def draw_pipes(self, out, left, top_end, bottom_start, bottom_end, valid):
+        # Above the ground a pipe column is pipe everywhere except its gap,
+        # and pipes never overlap horizontally. So each column only needs
+        # the start and length of one gap (a gap of every row where there is
+        # no pipe), and the whole layer is a single unsigned range test.
+        # bottom_end is the ground line whenever the bottom part exists.
+        games = out.shape[0]
+        gap_start = np.zeros((games, self.width), dtype=self.row_dtype)
+        gap_length = np.full((games, self.width), np.iinfo(self.row_dtype).max, dtype=self.row_dtype)
+        for k in range(len(left)):
+            first, last = self.cells(left[k], left[k] + self.pipe_width, self.col_edges, self.width)
+            covered = valid[k][:, None] & (self.cols >= first[:, None]) & (self.cols < last[:, None])
+            if not covered.any():
+                continue
+            _, top_rows = self.cells(np.zeros(games), top_end[k], self.row_edges, self.height)
+            bottom_rows, _ = self.cells(bottom_start[k], bottom_end[k], self.row_edges, self.height)
+            np.copyto(gap_start, top_rows[:, None], where=covered, casting='unsafe')
+            np.copyto(gap_length, np.maximum(bottom_rows - top_rows, 0)[:, None], where=covered, casting='unsafe')
+        sky = out[:, :self.ground_row]
+        offset = self.rows[:self.ground_row] - gap_start[:, None, :]
+        np.copyto(sky, PIPE_GRAY, where=offset >= gap_length[:, None, :])
+
+    def fill_rects(self, out, left, top, right, bottom, valid, value, span):
+        # One small rect per game, written cell by cell through index arrays
+        # so only the covered cells are touched
+        first_col, end_col = self.cells(left, right, self.col_edges, self.width)
+        first_row, end_row = self.cells(top, bottom, self.row_edges, self.height)
+        span_cols, span_rows = span
+        cols = first_col[:, None, None] + np.arange(span_cols)
+        rows = first_row[:, None, None] + np.arange(span_rows)[:, None]
+        inside = (cols < end_col[:, None, None]) & (rows < end_row[:, None, None])
+        if valid is not None:
+            inside &= valid[:, None, None]
+        games = np.broadcast_to(np.arange(len(left))[:, None, None], inside.shape)
+        if np.ndim(value):
+            value = np.broadcast_to(np.asarray(value)[:, None, None], inside.shape)[inside]
+        out[games[inside], np.broadcast_to(rows, inside.shape)[inside],
+            np.broadcast_to(cols, inside.shape)[inside]] = value
+
+    def render_batch(self, batch, out=None):
+        # Observation of every game of a batch_engine.BatchEngine
+        if out is None:
+            out = np.empty((batch.n, self.height, self.width), dtype=np.uint8)
+        pipes = (np.trunc(batch.pipe_x), batch.pipe_top_end, batch.pipe_bottom_start, batch.pipe_bottom_end,
+                 batch.pipe_active)
+        foods = (np.trunc(batch.food_x), np.trunc(batch.food_y), batch.food_type, batch.food_active)
+        left, top, size, _ = batch.bird_rects()
+        return self.render(out, pipes, foods, (np.broadcast_to(left, (batch.n,)), top, size))
+
+    def render_engine(self, engine, out=None):
+        # Observation of one engine.Engine, shape (height, width)
+        if out is None:
+            out = np.empty((self.height, self.width), dtype=np.uint8)
+        pipes = engine.pipes
+        pipes = tuple(np.array(values, dtype=float)[:, None] for values in (
+            [int(pipe.x) for pipe in pipes],
+            [pipe.top_end for pipe in pipes],
+            [pipe.bottom_start for pipe in pipes],
+            [pipe.bottom_end for pipe in pipes],
+        )) + (np.ones((len(pipes), 1), dtype=bool),)
+        foods = engine.foods
+        foods = (
+            np.array([int(food.x) for food in foods], dtype=float)[:, None],
+            np.array([int(food.y) for food in foods], dtype=float)[:, None],
+            np.array([FOOD_TYPES.index(food.food_type) for food in foods], dtype=np.intp)[:, None],
+            np.array([food.active for food in foods], dtype=bool)[:, None],
+        )
+        left, top, right, _ = engine.bird.collision_bounds()
+        bird = (np.array([left], dtype=float), np.array([top], dtype=float), np.array([right - left], dtype=float))
+        self.render(out[None], pipes, foods, bird)
+        return out
+
+
+class FrameStack:
+    # The last k observations of each of n games. Frames live in a ring of
+    # capacity slots per game and are rendered into it in place, so the
+    # stack is a view of k consecutive slots and nothing is copied per
+    # step. When the ring runs out, the newest k - 1 frames move to the
+    # front once, which costs (k - 1) / (capacity - k + 1) of a frame copy
+    # per step on average.
+    def __init__(self, n, k=STACK_FRAMES, height=OBS_HEIGHT, width=OBS_WIDTH, capacity=None):
+        self.k = k
+        capacity = capacity or 2 * k
+        self.buffer = np.zeros((n, capacity, height, width), dtype=np.uint8)
+        self.position = k - 1
+
+    def next_frame(self):
+        # (n, height, width) view to render the next observation into
+        self.position += 1
+        if self.position == self.buffer.shape[1]:
+            self.buffer[:, :self.k - 1] = self.buffer[:, -(self.k - 1):] if self.k > 1 else 0
+            self.position = self.k - 1
+        return self.buffer[:, self.position]
+
+    def frames(self):
+        # (n, k, height, width) view of the stacks, oldest frame first. It
+        # stays valid until the next call to next_frame().
+        return self.buffer[:, self.position - self.k + 1:self.position + 1]
+
+    def reset(self, games=None):
+        # Fill the history of the given games (all by default) with their
+        # latest frame, as at the start of a game
+        games = slice(None) if games is None else games
+        self.buffer[games, self.position - self.k + 1:self.position] = self.buffer[games, self.position, None]
@@ -0,0 +1,139 @@
+import csv
+import json
+import time
+import numpy as np
+import pygame
+
+# Frame phases in the order they run. Time between two marks is charged to
+# the phase named by the second mark, so the phases of a frame add up to the
+# whole frame with no gaps.
+PHASES = (
+    'wait',           # clock.tick sleeping to hold the frame rate
+    'events',
+    'spawn',
+    'pipe_update',    # move, collide and score pipes
+    'food_update',
+    'food_collide',
+    'bird_update',
+    'background',
+    'pipe_draw',
+    'food_draw',
+    'bird_draw',
+    'ground',
+    'hud',
+    'display',
+)
+PERCENTILES = (50, 95, 99)
+
+# Overlay placement and refresh
+OVERLAY_COLOR = (255, 255, 255)
+OVERLAY_BACKGROUND = (0, 0, 0, 160)
+OVERLAY_REFRESH = 30  # frames between overlay text updates
+
+
+class FrameProfiler:
+    # Per-phase frame times in milliseconds, kept for the last capacity
+    # frames in a fixed-size ring buffer. Nothing is allocated per frame.
+    def __init__(self, capacity=600, phases=PHASES, timer=time.perf_counter):
+        self.phases = phases
+        self.columns = {phase: i for i, phase in enumerate(phases)}
+        self.capacity = capacity
+        self.timer = timer
+        self.samples = np.zeros((capacity, len(phases)))
+        # Frame start times in ms since the profiler was created, for traces
+        self.starts = np.zeros(capacity)
+        self.origin = timer()
+        self.frames = 0
+        self.row = None
+        self.last = 0.0
+        # Overlay state
+        self.visible = False
+        self.overlay = None
+        self.overlay_frame = -OVERLAY_REFRESH
+
+    def begin_frame(self):
+        now = self.timer()
+        slot = self.frames % self.capacity
+        self.row = self.samples[slot]
+        self.row[:] = 0
+        self.starts[slot] = (now - self.origin) * 1000
+        self.last = now
+        self.frames += 1
+
+    def mark(self, phase):
+        # Charge the time since the previous mark to phase
+        now = self.timer()
+        self.row[self.columns[phase]] += (now - self.last) * 1000
+        self.last = now
+
+    def recorded(self):
+        # (starts, samples) of the recorded frames, oldest first
+        count = min(self.frames, self.capacity)
+        if self.frames <= self.capacity:
+            return self.starts[:count], self.samples[:count]
+        order = np.roll(np.arange(self.capacity), -(self.frames % self.capacity))
+        return self.starts[order], self.samples[order]
+
+    def percentiles(self, percentiles=PERCENTILES):
+        # {phase: [p50, p95, p99]} in ms, plus 'frame' for whole frames
+        _, samples = self.recorded()
+        if not len(samples):
+            return {}
+        totals = samples.sum(axis=1)
+        values = np.percentile(np.column_stack((samples, totals)), percentiles, axis=0)
+        names = self.phases + ('frame',)
+        return {name: [float(value) for value in values[:, i]] for i, name in enumerate(names)}
+
+    def write_chrome_trace(self, path):
+        # Trace-event JSON for chrome://tracing or Perfetto, one complete
+        # event per phase per frame, laid end to end in phase order
+        starts, samples = self.recorded()
+        events = []
+        for start, row in zip(starts, samples):
+            ts = start
+            for phase, duration in zip(self.phases, row):
+                if duration:
+                    events.append({'name': phase, 'ph': 'X', 'ts': round(ts * 1000, 3),
+                                   'dur': round(duration * 1000, 3), 'pid': 0, 'tid': 0})
+                ts += duration
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def write_csv(self, path):
+        starts, samples = self.recorded()
+        first = self.frames - len(samples)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame', 'start_ms') + self.phases)
+            for i, (start, row) in enumerate(zip(starts, samples)):
+                writer.writerow([first + i, '%.3f' % start] + ['%.4f' % value for value in row])
+
+    def toggle_overlay(self):
+        self.visible = not self.visible
+        self.overlay_frame = -OVERLAY_REFRESH
+
+    def draw_overlay(self, screen, font):
+        # Percentile table in the top right corner. The text is re-rendered
+        # every OVERLAY_REFRESH frames, otherwise the cached surface is blitted.
+        if self.frames - self.overlay_frame >= OVERLAY_REFRESH:
+            self.overlay_frame = self.frames
+            self.overlay = self.render_overlay(font)
+        return screen.blit(self.overlay, (screen.get_width() - self.overlay.get_width() - 10, 10))
+
+    def render_overlay(self, font):
+        stats = self.percentiles()
+        lines = ['%-13s %6s %6s %6s' % (('phase',) + tuple('p%d' % p for p in PERCENTILES))]
+        for name, values in stats.items():
+            lines.append('%-13s %6.2f %6.2f %6.2f' % ((name,) + tuple(values)))
+        line_height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines)
+        surface = pygame.Surface((width + 10, line_height * len(lines) + 10), pygame.SRCALPHA)
+        surface.fill(OVERLAY_BACKGROUND)
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, OVERLAY_COLOR), (5, 5 + i * line_height))
+        return surface
+
+
+def profiled_step(engine, profiler, action=False):
+    # Engine.step with a profiler mark after each phase
+    return engine.step_marked(action, profiler.mark)
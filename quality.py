@@ -0,0 +1,113 @@
+from settings import FPS
+
+# Detail levels, from full detail down. Each level drops one more piece of
+# decoration, cheapest to lose first; nothing the player needs is shed.
+QUALITY_LEVELS = (
+    ('full', 'everything drawn'),
+    ('no_clouds', 'cloud circles skipped'),
+    ('no_pebbles', 'ground drawn without pebbles'),
+    ('simple_bird', 'bird drawn without shading, wing arc and tail strokes'),
+    ('no_highlights', 'food drawn without highlights'),
+)
+FULL_QUALITY = 0
+NO_CLOUDS = 1
+NO_PEBBLES = 2
+SIMPLE_BIRD = 3
+NO_HIGHLIGHTS = 4
+LOWEST_QUALITY = len(QUALITY_LEVELS) - 1
+
+# Frame work, as a share of the frame budget, above which detail is shed
+# and below which it comes back. The gap between the two, and the longer
+# wait before restoring, stop the level from flickering at the edge.
+SHED_LOAD = 0.9
+RESTORE_LOAD = 0.6
+SHED_FRAMES = 15  # frames in a row over SHED_LOAD before dropping a level
+RESTORE_FRAMES = 180  # frames in a row under RESTORE_LOAD before raising one
+SMOOTHING = 0.1  # weight of the newest frame in the running frame time
+
+
+class QualityGovernor:
+    # Watches how long each frame's work takes against the frame budget of
+    # the fps target and moves between QUALITY_LEVELS: one level down after
+    # SHED_FRAMES frames over budget, one level up after RESTORE_FRAMES
+    # frames with headroom. The drawing code asks the feature properties
+    # (clouds, pebbles, bird_detail, food_highlights) what to draw.
+    def __init__(self, fps=FPS, level=FULL_QUALITY, min_level=FULL_QUALITY, max_level=LOWEST_QUALITY):
+        # fps 0 draws as fast as the display allows, so there is no budget
+        # to hold and the level stays where it starts
+        self.budget = 1.0 / fps if fps else None
+        self.level = level
+        self.min_level = min_level
+        self.max_level = max_level
+        self.frame_time = None
+        self.over = 0
+        self.under = 0
+        self.changes = 0
+        # Called as on_change(governor) after every level change
+        self.on_change = None
+
+    @property
+    def name(self):
+        return QUALITY_LEVELS[self.level][0]
+
+    @property
+    def clouds(self):
+        return self.level < NO_CLOUDS
+
+    @property
+    def pebbles(self):
+        return self.level < NO_PEBBLES
+
+    @property
+    def bird_detail(self):
+        return self.level < SIMPLE_BIRD
+
+    @property
+    def food_highlights(self):
+        return self.level < NO_HIGHLIGHTS
+
+    def frame(self, seconds):
+        # Report the work time of one frame, not counting the wait for the
+        # frame rate cap. Returns True if the level changed.
+        if self.frame_time is None:
+            self.frame_time = seconds
+        else:
+            self.frame_time += (seconds - self.frame_time) * SMOOTHING
+        if self.budget is None:
+            return False
+        load = self.frame_time / self.budget
+        self.over = self.over + 1 if load > SHED_LOAD else 0
+        self.under = self.under + 1 if load < RESTORE_LOAD else 0
+        if self.over >= SHED_FRAMES and self.level < self.max_level:
+            return self.set_level(self.level + 1)
+        if self.under >= RESTORE_FRAMES and self.level > self.min_level:
+            return self.set_level(self.level - 1)
+        return False
+
+    def set_level(self, level):
+        # Force a level, e.g. from a settings menu. Returns True if it changed.
+        level = max(self.min_level, min(self.max_level, level))
+        self.over = 0
+        self.under = 0
+        if level == self.level:
+            return False
+        self.level = level
+        self.changes += 1
+        if self.on_change:
+            self.on_change(self)
+        return True
+
+    def status(self):
+        # Current level and what it draws, as plain values for logs and tools
+        return {
+            'level': self.level,
+            'name': self.name,
+            'description': QUALITY_LEVELS[self.level][1],
+            'frame_ms': None if self.frame_time is None else self.frame_time * 1000,
+            'budget_ms': None if self.budget is None else self.budget * 1000,
+            'clouds': self.clouds,
+            'pebbles': self.pebbles,
+            'bird_detail': self.bird_detail,
+            'food_highlights': self.food_highlights,
+            'changes': self.changes,
+        }
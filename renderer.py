@@ -0,0 +1,70 @@
+import pygame
+from settings import SKY_BLUE
+
+
+class DirtyRectRenderer:
+    # Alternative to repainting the whole screen every frame. The sky and
+    # clouds live in a backdrop surface; each frame only the areas drawn over
+    # last frame are restored from it, and only those plus the newly drawn
+    # areas are pushed to the display.
+    def __init__(self, screen, background, sky_color=SKY_BLUE):
+        self.screen = screen
+        self.background = background
+        self.sky_color = sky_color
+        self.backdrop = pygame.Surface(screen.get_size())
+        if pygame.display.get_surface() is not None:
+            self.backdrop = self.backdrop.convert()
+        self.backdrop.fill(sky_color)
+        self.cloud_offset = None
+        self.clouds = True
+
+        # Areas drawn last frame (to erase), this frame, and areas that only
+        # need pushing to the display because they are redrawn every frame
+        self.restore = []
+        self.drawn = []
+        self.updated = []
+        self.full_update = True
+
+    def invalidate(self):
+        # Repaint and push the whole screen on the next frame
+        self.full_update = True
+
+    def begin_frame(self, ticks, clouds=True):
+        # Clouds only move every 100 ms, so the backdrop is rebuilt rarely.
+        # clouds=False leaves them out (see quality.QualityGovernor).
+        offset = self.background.cloud_offset(ticks)
+        if offset != self.cloud_offset or clouds != self.clouds:
+            self.cloud_offset = offset
+            self.clouds = clouds
+            band = self.background.cloud_band
+            self.backdrop.fill(self.sky_color, band)
+            if clouds:
+                self.background.draw_clouds(self.backdrop, ticks)
+            self.screen.blit(self.backdrop, band, band)
+            self.updated.append(band)
+
+        if self.full_update:
+            self.screen.blit(self.backdrop, (0, 0))
+        else:
+            for rect in self.restore:
+                self.screen.blit(self.backdrop, rect, rect)
+
+    def add(self, rect, restore=True):
+        # Record an area drawn this frame. Pass restore=False for opaque layers
+        # that are redrawn in the same place every frame, like the ground.
+        if rect is None:
+            return
+        if restore:
+            self.drawn.append(rect)
+        else:
+            self.updated.append(rect)
+
+    def end_frame(self):
+        if self.full_update:
+            pygame.display.update()
+            self.full_update = False
+        else:
+            pygame.display.update(self.restore + self.drawn + self.updated)
+        self.restore = self.drawn
+        self.drawn = []
+        self.updated = []
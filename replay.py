@@ -0,0 +1,222 @@
+import os
+import struct
+import sys
+import multiprocessing as mp
+from engine import Engine
+from settings import SIM_RATE
+
+# Replay file layout (little endian):
+#   header  - magic, version, seed, fps, collision mode (1 for masks), frames,
+#             score, food_count, flap count
+#   body    - gaps between consecutive flap frames as unsigned LEB128 varints,
+#             so a typical flap costs a single byte
+REPLAY_MAGIC = b'FBRP'
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct('<4sBqHBIIII')
+# Version 1 had no collision mode; those games were played with boxes
+REPLAY_HEADER_V1 = struct.Struct('<4sBqHIIII')
+REPLAY_EXTENSION = '.fbr'
+
+
+def encode_varints(values):
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data, count):
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    if len(values) != count:
+        raise ValueError('Replay is truncated: expected %d flaps, found %d' % (count, len(values)))
+    return values
+
+
+class Replay:
+    # One recorded game: the seed it was played with and the engine frames
+    # (Engine.frame before the step) on which the player flapped. frames,
+    # score and food_count are the recorded outcome used for verification.
+    # Mask and box collisions can end the same inputs differently, so the
+    # collision mode is part of the game.
+    def __init__(self, seed, flaps, frames, score=0, food_count=0, fps=SIM_RATE, collision_masks=False):
+        self.seed = seed
+        self.flaps = flaps
+        self.frames = frames
+        self.score = score
+        self.food_count = food_count
+        self.fps = fps
+        self.collision_masks = collision_masks
+
+    def to_bytes(self):
+        gaps = []
+        last = 0
+        for frame in self.flaps:
+            gaps.append(frame - last)
+            last = frame
+        header = REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, self.fps, self.collision_masks,
+                                    self.frames, self.score, self.food_count, len(self.flaps))
+        return header + encode_varints(gaps)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version = struct.unpack_from('<4sB', data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError('Not a replay file')
+        if version == REPLAY_VERSION:
+            header = REPLAY_HEADER
+            _, _, seed, fps, collision_masks, frames, score, food_count, count = header.unpack_from(data)
+        elif version == 1:
+            header = REPLAY_HEADER_V1
+            _, _, seed, fps, frames, score, food_count, count = header.unpack_from(data)
+            collision_masks = False
+        else:
+            raise ValueError('Unsupported replay version %d' % version)
+        flaps = []
+        frame = 0
+        for gap in decode_varints(data[header.size:], count):
+            frame += gap
+            flaps.append(frame)
+        return cls(seed, flaps, frames, score, food_count, fps, bool(collision_masks))
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    # Collects the flaps of the game in progress. GameSession calls begin()
+    # when a game starts, flap() for each flap and finish() on game over.
+    # Finished replays are kept in last and, with a directory, saved as
+    # <seed>.fbr.
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.seed = None
+        self.flaps = []
+        self.last = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def begin(self, seed):
+        self.seed = seed
+        self.flaps = []
+
+    def flap(self, frame):
+        self.flaps.append(frame)
+
+    def finish(self, engine):
+        replay = Replay(self.seed, self.flaps, engine.frame, engine.score, engine.food_count,
+                        engine.clock.fps, engine.collision_masks)
+        self.flaps = []
+        self.last = replay
+        if self.directory:
+            replay.save(os.path.join(self.directory, '%d%s' % (replay.seed, REPLAY_EXTENSION)))
+        return replay
+
+
+def replay_engine(replay, engine=None):
+    # engine if it plays the replay's game, at its fps and collision mode,
+    # otherwise a new Engine that does
+    if engine is None or engine.clock.fps != replay.fps or engine.collision_masks != replay.collision_masks:
+        engine = Engine(fps=replay.fps, collision_masks=replay.collision_masks)
+    return engine
+
+
+def simulate(replay, engine=None):
+    # Re-run a replay headlessly as fast as the engine can step. Stops on
+    # game over or after the recorded number of frames; returns the engine.
+    engine = replay_engine(replay, engine)
+    engine.reset(seed=replay.seed)
+    flaps = iter(replay.flaps)
+    next_flap = next(flaps, -1)
+    step = engine.step
+    clock = engine.clock
+    while clock.frame < replay.frames:
+        if clock.frame == next_flap:
+            next_flap = next(flaps, -1)
+            if step(True):
+                break
+        elif step(False):
+            break
+    return engine
+
+
+def verify(replay, engine=None):
+    # True if re-simulating the replay reproduces its recorded outcome
+    engine = simulate(replay, engine)
+    return (engine.frame, engine.score, engine.food_count) == (replay.frames, replay.score, replay.food_count)
+
+
+def _verify_paths(paths):
+    engine = None
+    results = []
+    for path in paths:
+        replay = Replay.load(path)
+        engine = replay_engine(replay, engine)
+        results.append((path, verify(replay, engine)))
+    return results
+
+
+def verify_files(paths, processes=None):
+    # Verify many replay files across a process pool. Returns (path, ok) pairs.
+    paths = list(paths)
+    processes = min(processes or mp.cpu_count(), max(len(paths), 1))
+    chunks = [paths[i::processes] for i in range(processes)]
+    with mp.Pool(processes) as pool:
+        results = pool.map(_verify_paths, chunks)
+    return [result for chunk in results for result in chunk]
+
+
+def play(replay, engine, render, clock=None):
+    # Render a replay at normal speed with the same render(engine, state)
+    # callback the game session uses. Closing the window stops playback.
+    import pygame
+    from session import PLAYING, GAME_OVER
+
+    engine.reset(seed=replay.seed)
+    flaps = set(replay.flaps)
+    # Keep drawing for a second after the end so the final frame is visible
+    end = replay.frames + replay.fps
+    while engine.frame < end:
+        if clock:
+            clock.tick(replay.fps)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return engine
+        engine.step(engine.frame in flaps)
+        render(engine, GAME_OVER if engine.game_over else PLAYING)
+    return engine
+
+
+if __name__ == '__main__':
+    # python replay.py verify <files...>  - headless check of recorded outcomes
+    # python replay.py play <file>        - watch a replay in the game window
+    if len(sys.argv) < 3 or sys.argv[1] not in ('verify', 'play'):
+        print('usage: replay.py verify <files...> | play <file>')
+        sys.exit(2)
+    if sys.argv[1] == 'verify':
+        results = verify_files(sys.argv[2:])
+        for path, ok in results:
+            if not ok:
+                print('MISMATCH', path)
+        failed = sum(not ok for _, ok in results)
+        print('%d replays, %d mismatched' % (len(results), failed))
+        sys.exit(1 if failed else 0)
+    else:
+        import main
+        main.play_replay(sys.argv[2])
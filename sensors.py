@@ -0,0 +1,164 @@
+import numpy as np
+from batch_engine import BIRD_X, TOP_BUFFER, FOOD_SIZE
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT
+
+# Sensor channels - what each distance was measured against
+SENSOR_PIPE = 0
+SENSOR_BOUNDARY = 1  # ground or ceiling
+SENSOR_FOOD = 2
+SENSOR_CHANNELS = 3
+
+
+class RaySensor:
+    # A fan of rays cast from the bird's center. For every ray it reports
+    # the distance from the edge of the bird's collision box to the nearest
+    # pipe, boundary and food item, divided by max_distance and capped at 1
+    # (1 = nothing in range). Everything is computed as array operations over
+    # (entities, rays, games), so one call covers a whole batch of games.
+    def __init__(self, rays=9, spread=np.pi, max_distance=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 ground_height=GROUND_HEIGHT, top_buffer=TOP_BUFFER):
+        # Rays fan out symmetrically around straight ahead (+x); the default
+        # spread runs from straight up to straight down
+        self.angles = np.linspace(-spread / 2, spread / 2, rays) if rays > 1 else np.zeros(1)
+        dx = np.cos(self.angles)
+        dy = np.sin(self.angles)
+        # Axis-parallel rays would divide by zero; a tiny component keeps the
+        # slab test finite without moving any hit by a visible amount
+        dx = np.where(np.abs(dx) < 1e-9, 1e-9, dx)
+        dy = np.where(np.abs(dy) < 1e-9, 1e-9, dy)
+        self.inv_dx = 1 / dx
+        self.inv_dy = 1 / dy
+        self.inv_dx32 = self.inv_dx.astype(np.float32)
+        self.inv_dy32 = self.inv_dy.astype(np.float32)
+        # Rays grouped by direction signs, with the rect edges each group
+        # enters and leaves through, see cast_rects
+        self.groups = []
+        for right in (True, False):
+            for down in (True, False):
+                rays = np.flatnonzero(((dx > 0) == right) & ((dy > 0) == down))
+                if len(rays):
+                    # Rays are in angle order, so a group is usually one slice
+                    if rays[-1] - rays[0] == len(rays) - 1:
+                        rays = slice(rays[0], rays[-1] + 1)
+                    self.groups.append((
+                        rays,
+                        'left' if right else 'right', 'right' if right else 'left',
+                        'top' if down else 'bottom', 'bottom' if down else 'top',
+                    ))
+        self.max_distance = max_distance
+        self.ground = screen_height - ground_height
+        self.ceiling = top_buffer
+
+    @property
+    def rays(self):
+        return len(self.angles)
+
+    def cast_rects(self, x, y, left, top, right, bottom, valid):
+        # Distance along every ray to the nearest valid rect (slab method).
+        # x, y have shape (games,), the rect edges (rects, games) like the
+        # BatchEngine tables. Returns (rays, games); inf where nothing is hit.
+        result = np.full((self.rays, len(x)), np.inf, dtype=np.float32)
+        if not len(left):
+            return result
+        # Edge offsets from the ray origin, shaped (rects, 1, games) so the
+        # games axis stays innermost. Single precision is plenty for screen
+        # distances and halves the memory traffic.
+        edges = {
+            'left': (left - x).astype(np.float32)[:, None, :],
+            'right': (right - x).astype(np.float32)[:, None, :],
+            'top': (top - y).astype(np.float32)[:, None, :],
+            'bottom': (bottom - y).astype(np.float32)[:, None, :],
+        }
+        invalid = ~valid[:, None, :]
+        inf = np.float32(np.inf)
+        # Within a group of rays sharing the signs of dx and dy, the entry and
+        # exit edge of every rect is known up front, so the slab test needs
+        # no per-element min/max to sort the edges
+        for rays, near_x, far_x, near_y, far_y in self.groups:
+            inv_dx = self.inv_dx32[rays, None]
+            inv_dy = self.inv_dy32[rays, None]
+            near = np.maximum(edges[near_x] * inv_dx, edges[near_y] * inv_dy)
+            far = np.minimum(edges[far_x] * inv_dx, edges[far_y] * inv_dy)
+            # A ray starting inside a rect hits it at distance 0
+            np.maximum(near, 0, out=near)
+            miss = far < near
+            miss |= invalid
+            np.copyto(near, inf, where=miss)
+            near.min(axis=0, out=result[rays])
+        return result
+
+    def cast_boundaries(self, y):
+        # Distance along every ray to the ground or the ceiling, (rays, games)
+        down = (self.inv_dy > 0)[:, None]
+        return np.where(down, (self.ground - y) * self.inv_dy[:, None], (self.ceiling - y) * self.inv_dy[:, None])
+
+    def sense(self, x, y, half_width, half_height, pipes, foods, out=None):
+        # x, y, half_width, half_height have shape (games,). pipes and foods
+        # are (left, top, right, bottom, valid) tuples of (k, games) arrays.
+        # Returns (games, rays, SENSOR_CHANNELS).
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if out is None:
+            out = np.empty((len(x), self.rays, SENSOR_CHANNELS))
+        # How far each ray travels inside the bird's own collision box
+        box = np.minimum(np.abs(self.inv_dx)[:, None] * np.asarray(half_width, dtype=float),
+                         np.abs(self.inv_dy)[:, None] * np.asarray(half_height, dtype=float))
+        # Written through a (channels, rays, games) view so every channel is
+        # produced in the games-innermost layout cast_rects works in
+        distances = out.transpose(2, 1, 0)
+        np.subtract(self.cast_rects(x, y, *pipes), box, out=distances[SENSOR_PIPE])
+        np.subtract(self.cast_boundaries(y), box, out=distances[SENSOR_BOUNDARY])
+        np.subtract(self.cast_rects(x, y, *foods), box, out=distances[SENSOR_FOOD])
+        np.clip(out, 0, self.max_distance, out=out)
+        out /= self.max_distance
+        return out
+
+    def sense_batch(self, batch, out=None):
+        # Sensor readings for every game of a batch_engine.BatchEngine.
+        # Pipe and food rects are the ones BatchEngine collides with.
+        pipe_left = np.trunc(batch.pipe_x)
+        pipe_right = pipe_left + batch.pipe_width
+        active = batch.pipe_active
+        top_end = batch.pipe_top_end
+        bottom_start = batch.pipe_bottom_start
+        bottom_end = batch.pipe_bottom_end
+        # Top and bottom part of every pipe slot, one after the other
+        pipes = (
+            np.concatenate((pipe_left, pipe_left)),
+            np.concatenate((np.zeros_like(top_end), bottom_start)),
+            np.concatenate((pipe_right, pipe_right)),
+            np.concatenate((top_end, bottom_end)),
+            np.concatenate((active & (top_end > 0), active & (bottom_end > bottom_start))),
+        )
+        food_left = np.trunc(batch.food_x)
+        food_top = np.trunc(batch.food_y)
+        foods = (food_left, food_top, food_left + FOOD_SIZE, food_top + FOOD_SIZE, batch.food_active)
+        half = batch.collision_size / 2
+        return self.sense(np.full(batch.n, BIRD_X, dtype=float), batch.y, half, half, pipes, foods, out)
+
+    def sense_engine(self, engine, out=None):
+        # Sensor readings for one engine.Engine, shape (rays, SENSOR_CHANNELS)
+        bird = engine.bird
+        pipes = engine.pipes
+        left = np.array([int(pipe.x) for pipe in pipes] * 2, dtype=float)
+        top_end = np.array([pipe.top_end for pipe in pipes], dtype=float)
+        bottom_start = np.array([pipe.bottom_start for pipe in pipes], dtype=float)
+        bottom_end = np.array([pipe.bottom_end for pipe in pipes], dtype=float)
+        pipe_rects = (
+            left,
+            np.concatenate((np.zeros_like(top_end), bottom_start)),
+            left + pipes.width,
+            np.concatenate((top_end, bottom_end)),
+            np.concatenate((top_end > 0, bottom_end > bottom_start)),
+        )
+        foods = [food for food in engine.foods if food.active]
+        food_left = np.array([int(food.x) for food in foods], dtype=float)
+        food_top = np.array([int(food.y) for food in foods], dtype=float)
+        food_rects = (food_left, food_top, food_left + FOOD_SIZE, food_top + FOOD_SIZE,
+                      np.ones(len(foods), dtype=bool))
+        result = self.sense(
+            [bird.x], [bird.y], [bird.collision_width / 2], [bird.collision_height / 2],
+            tuple(part[:, None] for part in pipe_rects), tuple(part[:, None] for part in food_rects),
+            None if out is None else out[None]
+        )
+        return result[0]
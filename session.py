@@ -0,0 +1,156 @@
+import time
+import random
+import pygame
+from settings import FPS, MAX_FRAME_TIME
+from profiler import profiled_step
+
+# Session states
+ATTRACT = 'attract'
+PLAYING = 'playing'
+GAME_OVER = 'game_over'
+
+
+class GameSession:
+    # Owns the game loop and moves between the attract screen, play and the
+    # game over screen. Restarting resets the engine in place, so a session
+    # can go through any number of games without growing the call stack or
+    # rebuilding the bird, pipe pool and HUD caches.
+    def __init__(self, engine, render, clock=None, fps=FPS, attract=False, attract_timeout=None,
+                 seed=None, recorder=None, profiler=None, capture=None, quality=None, timer=time.perf_counter):
+        self.engine = engine
+        # Called as render(engine, state, alpha) once per frame, where alpha
+        # is how far the display is between the last two simulation steps
+        self.render = render
+        self.clock = clock
+        # Render rate cap; the simulation rate is the engine's clock rate
+        self.fps = fps
+        # Real time in seconds that drives the simulation steps
+        self.timer = timer
+        # Frames spent on the game over screen before going back to attract
+        self.attract_timeout = attract_timeout
+        # Deterministic mode: every game gets its own seed drawn from the
+        # session seed, so a session is reproducible game by game and each
+        # game can be replayed on its own (see replay.py)
+        self.seeds = random.Random(seed) if seed is not None or recorder else None
+        self.recorder = recorder
+        # Optional FrameProfiler; F3 toggles its overlay and F4 writes its
+        # trace and CSV files
+        self.profiler = profiler
+        # Optional capture.FrameCapture fed every rendered frame; F5 saves
+        # its last seconds as a clip
+        self.capture = capture
+        # Optional quality.QualityGovernor told how long each frame's work
+        # took, so render can shed decorations under load
+        self.quality = quality
+        self.game_seed = None
+        self.state = ATTRACT if attract else PLAYING
+        self.state_frames = 0
+        self.restarts = 0
+        self.running = True
+        self.new_game()
+
+    def new_game(self):
+        if self.seeds is None:
+            self.engine.reset()
+            return
+        self.game_seed = self.seeds.getrandbits(63)
+        self.engine.reset(seed=self.game_seed)
+        if self.recorder:
+            self.recorder.begin(self.game_seed)
+
+    def set_state(self, state):
+        self.state = state
+        self.state_frames = 0
+
+    def restart(self, state=PLAYING):
+        self.new_game()
+        self.restarts += 1
+        self.set_state(state)
+
+    def handle_event(self, event):
+        # Returns True if the event asks for a flap this frame
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                if self.state == ATTRACT:
+                    self.set_state(PLAYING)
+                return self.state == PLAYING
+            if event.key == pygame.K_r and self.state == GAME_OVER:
+                self.restart()
+            if self.profiler:
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay()
+                elif event.key == pygame.K_F4:
+                    name = 'profile_%d' % self.profiler.frames
+                    self.profiler.write_chrome_trace(name + '.json')
+                    self.profiler.write_csv(name + '.csv')
+            if self.capture and event.key == pygame.K_F5:
+                self.capture.save_clip()
+        return False
+
+    def update(self, flap=False):
+        # Advance one simulation step for the current state
+        self.state_frames += 1
+        if self.state == ATTRACT:
+            # Nothing moves until the player starts
+            return
+        flap = flap and self.state == PLAYING
+        if flap and self.recorder:
+            self.recorder.flap(self.engine.frame)
+        # The engine keeps stepping after game over so the bird falls to the ground
+        if self.profiler:
+            game_over = profiled_step(self.engine, self.profiler, flap)
+        else:
+            game_over = self.engine.step(flap)
+        if game_over and self.state == PLAYING:
+            if self.recorder:
+                self.recorder.finish(self.engine)
+            self.set_state(GAME_OVER)
+        elif (self.state == GAME_OVER and self.attract_timeout is not None
+                and self.state_frames >= self.attract_timeout):
+            self.restart(ATTRACT)
+
+    def run(self):
+        # Fixed timestep: each rendered frame runs however many simulation
+        # steps fit in the real time that passed, and the remainder becomes
+        # the interpolation factor for drawing. A slow display runs several
+        # steps per frame, a fast one renders between steps.
+        profiler = self.profiler
+        step_time = 1.0 / self.engine.clock.fps
+        accumulator = 0.0
+        flap = False
+        previous = self.timer()
+        while self.running:
+            if profiler:
+                profiler.begin_frame()
+            if self.clock:
+                self.clock.tick(self.fps)
+            if profiler:
+                profiler.mark('wait')
+            # Frame work starts after the wait for the frame rate cap
+            work_start = self.timer()
+
+            for event in pygame.event.get():
+                flap = self.handle_event(event) or flap
+            if not self.running:
+                break
+            if profiler:
+                profiler.mark('events')
+
+            now = self.timer()
+            # After a stall, drop the time beyond MAX_FRAME_TIME instead of
+            # trying to simulate all of it at once
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            while accumulator >= step_time:
+                # A flap lands on the first step after the key press
+                self.update(flap)
+                flap = False
+                accumulator -= step_time
+
+            self.render(self.engine, self.state, accumulator / step_time)
+            if self.capture:
+                self.capture.capture()
+            if self.quality:
+                self.quality.frame(self.timer() - work_start)
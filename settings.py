@@ -0,0 +1,43 @@
+# Shared game configuration, importable without touching pygame
+
+# Screen dimensions
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+# Colors
+SKY_BLUE = (135, 206, 235)
+WHITE = (255, 255, 255)
+GREEN = (0, 128, 0)
+BROWN = (139, 69, 19)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
+BLACK = (0, 0, 0)
+
+# Game variables
+FPS = 60  # Frame rate cap for rendering, 0 to draw as fast as the display allows
+SIM_RATE = 60  # Fixed simulation steps per second
+PHYSICS_RATE = 60  # Step rate GRAVITY, FLAP_STRENGTH and GAME_SPEED are tuned for
+MAX_FRAME_TIME = 0.25  # Longest frame (s) the simulation catches up on
+GRAVITY = 0.3
+FLAP_STRENGTH = -10
+GAME_SPEED = 3
+PIPE_FREQUENCY = 1800  # milliseconds
+PIPE_GAP_START = 400  # Starting gap size
+PIPE_GAP_MIN = 250  # Minimum gap size
+GAP_DECREASE_RATE = 0.05  # How quickly the gap narrows
+GROUND_HEIGHT = 100
+COLLISION_MASKS = False  # Collide with the bird and food as drawn rather than the bird's square box
+
+# Food spawning
+FOOD_FREQUENCY_START = 3000  # milliseconds between food spawns
+FOOD_FREQUENCY_MIN = 1500
+
+# Rendering
+DIRTY_RECTS = False  # Repaint and push only changed screen areas
+PROFILE = False  # Time each frame phase; F3 shows the overlay, F4 writes trace files
+ADAPTIVE_QUALITY = False  # Drop decorative detail while frames run over the FPS budget, see quality.py
+
+# Frame capture
+CAPTURE = False  # Stream rendered frames to CAPTURE_DIR; F5 saves the last CLIP_SECONDS as a clip
+CAPTURE_DIR = 'captures'
+CLIP_SECONDS = 10
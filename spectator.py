@@ -0,0 +1,521 @@
+import sys
+import socket
+import struct
+import asyncio
+import argparse
+from collections import deque
+from engine import Engine
+from food import Food
+from replay import Replay, encode_varints, replay_engine
+from settings import SIM_RATE, MAX_FRAME_TIME
+
+# Wire format (little endian). Every server message is a u32 length followed
+# by a frame:
+#   header   - kind, tick, base tick, mask of the scalar fields that follow
+#   scalars  - only the fields that differ from the base state
+#   pipes    - first pipe id (u32), count and number of new pipes (u16),
+#              x of every pipe, then height, bottom and top of the new
+#              pipes only
+#   foods    - first food id, count and number of new foods as for pipes,
+#              x of every food, active flags as a varint bitmask, then y
+#              and type of new foods
+# A keyframe is the same frame encoded against no base, so every field and
+# entity is "new". Clients send 5 byte messages: HELLO with the game they
+# want to watch, and ACK with the last tick they decoded.
+FRAME_KEY = 1
+FRAME_DELTA = 2
+FRAME_HEADER = struct.Struct('<BIIH')
+ENTITY_HEADER = struct.Struct('<IHH')
+LENGTH = struct.Struct('<I')
+CLIENT_HELLO = 1
+CLIENT_ACK = 2
+CLIENT_MESSAGE = struct.Struct('<BI')
+
+# Scalar fields of a state, in mask bit order
+SCALAR_FIELDS = (
+    ('generation', 'H'),  # games started by the feed; entity ids restart with each game
+    ('frame', 'I'),
+    ('score', 'I'),
+    ('food_count', 'I'),
+    ('flags', 'B'),
+    ('y', 'd'),  # doubles, so the truncated draw position matches the server's exactly
+    ('prev_y', 'd'),
+    ('vel_y', 'f'),
+    ('size_factor', 'f'),
+    ('bounce_time', 'I'),
+)
+FLAG_GAME_OVER = 1
+FLAG_WING_UP = 2
+FLAG_COLLIDED = 4
+FLAG_BOUNCING = 8
+ALL_SCALARS = (1 << len(SCALAR_FIELDS)) - 1
+PIPE_STATIC = struct.Struct('<fff')  # height, bottom, top
+FOOD_STATIC = struct.Struct('<hB')   # y, type
+FOOD_TYPES = tuple(Food.COLORS)
+
+# Server limits
+HISTORY_TICKS = SIM_RATE * 2  # states kept per game to encode deltas against
+WRITE_BUFFER_HIGH = 64 * 1024  # bytes queued for a client before it is skipped
+STALL_TIMEOUT = 10.0  # seconds a client may stay over the limit before it is dropped
+DEFAULT_PORT = 7878
+
+_scalar_structs = {}
+
+
+def scalar_struct(mask):
+    # Struct for the scalar fields selected by mask, built once per mask
+    packer = _scalar_structs.get(mask)
+    if packer is None:
+        packer = _scalar_structs[mask] = struct.Struct(
+            '<' + ''.join(fmt for i, (_, fmt) in enumerate(SCALAR_FIELDS) if mask >> i & 1))
+    return packer
+
+
+def capture(engine, generation):
+    # Flat, immutable copy of what a spectator needs to draw the engine:
+    # (scalars, first pipe id, pipe xs, pipe statics, first food id, food xs,
+    # food active flags, food statics). Entities are numbered in spawn order,
+    # and both stores expire from the front, so ids are contiguous.
+    bird = engine.bird
+    flags = ((FLAG_GAME_OVER if engine.game_over else 0) | (FLAG_WING_UP if bird.wing_up else 0)
+             | (FLAG_COLLIDED if bird.is_collided else 0) | (FLAG_BOUNCING if bird.is_bouncing else 0))
+    scalars = (generation, engine.frame, engine.score, engine.food_count, flags, bird.y, engine.prev_bird_y,
+               bird.vel_y, bird.size_factor, bird.bounce_time)
+    pipes = engine.pipes
+    foods = engine.foods
+    return (
+        scalars,
+        engine.total_pipes_generated - len(pipes) + 1,
+        tuple(pipe.x for pipe in pipes),
+        tuple((pipe.height, pipe.bottom, pipe.top) for pipe in pipes),
+        engine.total_foods_generated - len(foods) + 1,
+        tuple(food.x for food in foods),
+        tuple(food.active for food in foods),
+        tuple((food.y, FOOD_TYPES.index(food.food_type)) for food in foods),
+    )
+
+
+def _new_entities(first, count, base_first, base_count):
+    # Number of entities at the end of the list the base has not seen
+    if base_first is None:
+        return count
+    return max(0, min(count, first + count - (base_first + base_count)))
+
+
+def encode(tick, state, base_tick=None, base=None):
+    # Frame for state, as a delta against base when there is one. A base
+    # from an earlier game cannot be used since entity ids start over.
+    if base is not None and base[0][0] != state[0][0]:
+        base = None
+    scalars, pipe_first, pipe_xs, pipe_statics, food_first, food_xs, food_active, food_statics = state
+    if base is None:
+        kind, base_tick, mask = FRAME_KEY, 0, ALL_SCALARS
+        base_pipes = base_foods = (None, 0)
+    else:
+        kind = FRAME_DELTA
+        mask = 0
+        for i, (value, old) in enumerate(zip(scalars, base[0])):
+            if value != old:
+                mask |= 1 << i
+        base_pipes = base[1], len(base[2])
+        base_foods = base[4], len(base[5])
+
+    parts = [FRAME_HEADER.pack(kind, tick, base_tick, mask)]
+    if mask:
+        parts.append(scalar_struct(mask).pack(*(value for i, value in enumerate(scalars) if mask >> i & 1)))
+
+    count = len(pipe_xs)
+    new = _new_entities(pipe_first, count, *base_pipes)
+    parts.append(ENTITY_HEADER.pack(pipe_first, count, new))
+    parts.append(struct.pack('<%df' % count, *pipe_xs))
+    for static in pipe_statics[count - new:]:
+        parts.append(PIPE_STATIC.pack(*static))
+
+    count = len(food_xs)
+    new = _new_entities(food_first, count, *base_foods)
+    parts.append(ENTITY_HEADER.pack(food_first, count, new))
+    parts.append(struct.pack('<%df' % count, *food_xs))
+    parts.append(encode_varints([sum(1 << i for i, active in enumerate(food_active) if active)]))
+    for static in food_statics[count - new:]:
+        parts.append(FOOD_STATIC.pack(*static))
+    return b''.join(parts)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _decode_entities(data, offset, base_first, base_statics):
+    # (first id, xs, statics of the kept entities, new count, offset after
+    # the xs) - the caller reads the new entities' statics
+    first, count, new = ENTITY_HEADER.unpack_from(data, offset)
+    offset += ENTITY_HEADER.size
+    xs = struct.unpack_from('<%df' % count, data, offset)
+    offset += 4 * count
+    kept = count - new
+    if kept:
+        start = first - base_first
+        statics = base_statics[start:start + kept]
+    else:
+        statics = ()
+    return first, xs, statics, new, offset
+
+
+def decode(data, states):
+    # (tick, state) from a frame; delta frames are applied to their base
+    # state, looked up by tick in states
+    kind, tick, base_tick, mask = FRAME_HEADER.unpack_from(data)
+    offset = FRAME_HEADER.size
+    base = states[base_tick] if kind == FRAME_DELTA else None
+
+    values = scalar_struct(mask).unpack_from(data, offset) if mask else ()
+    offset += scalar_struct(mask).size if mask else 0
+    changed = iter(values)
+    scalars = tuple(next(changed) if mask >> i & 1 else base[0][i] for i in range(len(SCALAR_FIELDS)))
+
+    base_first, base_statics = (base[1], base[3]) if base else (0, ())
+    pipe_first, pipe_xs, pipe_statics, new, offset = _decode_entities(data, offset, base_first, base_statics)
+    pipe_statics += tuple(PIPE_STATIC.unpack_from(data, offset + i * PIPE_STATIC.size) for i in range(new))
+    offset += new * PIPE_STATIC.size
+
+    base_first, base_statics = (base[4], base[7]) if base else (0, ())
+    food_first, food_xs, food_statics, new, offset = _decode_entities(data, offset, base_first, base_statics)
+    active, offset = _read_varint(data, offset)
+    food_active = tuple(bool(active >> i & 1) for i in range(len(food_xs)))
+    food_statics += tuple(FOOD_STATIC.unpack_from(data, offset + i * FOOD_STATIC.size) for i in range(new))
+    return tick, (scalars, pipe_first, pipe_xs, pipe_statics, food_first, food_xs, food_active, food_statics)
+
+
+def apply(state, engine):
+    # Load a decoded state into an Engine used only for drawing
+    scalars, _, pipe_xs, pipe_statics, _, food_xs, food_active, food_statics = state
+    _, frame, engine.score, engine.food_count, flags, y, engine.prev_bird_y, vel_y, size_factor, bounce_time = scalars
+    engine.clock.frame = frame
+    engine.game_over = bool(flags & FLAG_GAME_OVER)
+    bird = engine.bird
+    bird.y = y
+    bird.vel_y = vel_y
+    bird.size_factor = size_factor
+    bird.collision_width = bird.collision_height = int(30 * size_factor)
+    bird.wing_up = bool(flags & FLAG_WING_UP)
+    bird.is_collided = bool(flags & FLAG_COLLIDED)
+    bird.is_bouncing = bool(flags & FLAG_BOUNCING)
+    bird.bounce_time = bounce_time
+
+    # Pipes and food are restored rather than built, so nothing is drawn
+    # from the random module; the pipe extents follow from the frame's gap
+    engine.pipes.clear()
+    for x, (height, bottom, top) in zip(pipe_xs, pipe_statics):
+        pipe = engine.pipe_pool.restore((x, False, bottom - height, height, top, bottom, None, None, None))
+        pipe.set_extents()
+        engine.pipes.append(pipe)
+    engine.foods.clear()
+    for x, active, (food_y, food_type) in zip(food_xs, food_active, food_statics):
+        engine.foods.append(Food.restored((x, food_y, engine.step_speed * 1.5, active, FOOD_TYPES[food_type])))
+    return engine
+
+
+class ReplayFeed:
+    # A game for spectators that plays recorded replays one after another,
+    # holding each final frame for a second
+    def __init__(self, replays, fps=SIM_RATE):
+        self.replays = replays
+        self.engine = Engine(fps=fps)
+        self.generation = 0
+        self.index = -1
+        self.start()
+
+    def start(self):
+        self.index = (self.index + 1) % len(self.replays)
+        self.replay = self.replays[self.index]
+        self.flaps = set(self.replay.flaps)
+        self.engine = replay_engine(self.replay, self.engine)
+        self.engine.reset(seed=self.replay.seed)
+        self.generation = (self.generation + 1) & 0xffff
+
+    def step(self):
+        engine = self.engine
+        if engine.frame >= self.replay.frames + self.replay.fps:
+            self.start()
+        engine.step(engine.frame in self.flaps)
+
+
+class PolicyFeed:
+    # A game for spectators flown by policy(engine) -> flap, restarting on
+    # the next seed a second after each game over
+    def __init__(self, policy, seed=0, fps=SIM_RATE):
+        self.policy = policy
+        self.seed = seed
+        self.engine = Engine(fps=fps)
+        self.generation = 0
+        self.over_frames = 0
+        self.start()
+
+    def start(self):
+        self.engine.reset(seed=self.seed + self.generation)
+        self.generation = (self.generation + 1) & 0xffff
+        self.over_frames = 0
+
+    def step(self):
+        engine = self.engine
+        if engine.game_over:
+            self.over_frames += 1
+            if self.over_frames > engine.clock.fps:
+                self.start()
+        engine.step(self.policy(engine))
+
+
+class SpectatorProtocol(asyncio.Protocol):
+    # One connected spectator. Writes go through the transport's buffer;
+    # while it is above the high-water mark the server skips this client,
+    # which costs nothing since the next frame is a delta from its last ack.
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.game = None
+        self.acked = None
+        self.paused_at = None
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self.server.write_buffer_high)
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def data_received(self, data):
+        self.buffer += data
+        size = CLIENT_MESSAGE.size
+        end = len(self.buffer) - len(self.buffer) % size
+        for offset in range(0, end, size):
+            kind, value = CLIENT_MESSAGE.unpack_from(self.buffer, offset)
+            if kind == CLIENT_HELLO and value < len(self.server.feeds):
+                self.server.subscribe(self, value)
+            elif kind == CLIENT_ACK and (self.acked is None or value > self.acked):
+                self.acked = value
+        self.buffer = self.buffer[end:]
+
+    def pause_writing(self):
+        self.paused_at = self.server.loop.time()
+
+    def resume_writing(self):
+        self.paused_at = None
+
+    def connection_lost(self, exc):
+        self.server.unsubscribe(self)
+
+
+class SpectatorServer:
+    # Steps every feed at the simulation rate and broadcasts each new state
+    # to the spectators of that game. Frames are encoded once per distinct
+    # base tick per broadcast, however many clients share that base.
+    def __init__(self, feeds, tick_rate=SIM_RATE, history=HISTORY_TICKS, write_buffer_high=WRITE_BUFFER_HIGH,
+                 stall_timeout=STALL_TIMEOUT):
+        self.feeds = feeds
+        self.tick_rate = tick_rate
+        self.write_buffer_high = write_buffer_high
+        self.stall_timeout = stall_timeout
+        self.tick = 0
+        # Per game: recent states by tick, and the order they expire in
+        self.states = [{} for _ in feeds]
+        self.history = [deque(maxlen=history) for _ in feeds]
+        self.spectators = [set() for _ in feeds]
+        self.loop = None
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def subscribe(self, client, game):
+        self.unsubscribe(client)
+        client.game = game
+        client.acked = None
+        self.spectators[game].add(client)
+
+    def unsubscribe(self, client):
+        if client.game is not None:
+            self.spectators[client.game].discard(client)
+            client.game = None
+
+    def step(self):
+        # Advance every game one tick and send the result
+        self.tick += 1
+        for game, feed in enumerate(self.feeds):
+            feed.step()
+            states = self.states[game]
+            history = self.history[game]
+            if len(history) == history.maxlen:
+                del states[history[0]]
+            history.append(self.tick)
+            states[self.tick] = state = capture(feed.engine, feed.generation)
+            if self.spectators[game]:
+                self.broadcast(game, state, states)
+
+    def broadcast(self, game, state, states):
+        now = self.loop.time() if self.loop else 0
+        frames = {}
+        for client in list(self.spectators[game]):
+            if client.transport.is_closing():
+                self.unsubscribe(client)
+                continue
+            if client.paused_at is not None:
+                if now - client.paused_at > self.stall_timeout:
+                    client.transport.close()
+                else:
+                    self.frames_skipped += 1
+                continue
+            # Clients that have not acked anything recent get a keyframe
+            base_tick = client.acked if client.acked in states else None
+            frame = frames.get(base_tick)
+            if frame is None:
+                payload = encode(self.tick, state, base_tick, states.get(base_tick))
+                frame = frames[base_tick] = LENGTH.pack(len(payload)) + payload
+            client.transport.write(frame)
+            self.frames_sent += 1
+
+    async def run(self):
+        # Fixed-rate tick loop; after a stall it resumes from now instead of
+        # trying to catch up on every missed tick
+        self.loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        next_tick = self.loop.time()
+        while True:
+            self.step()
+            next_tick += period
+            delay = next_tick - self.loop.time()
+            if delay < -MAX_FRAME_TIME:
+                next_tick = self.loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        # Listen on TCP, or on a Unix socket when path is given
+        loop = asyncio.get_running_loop()
+        if path:
+            server = await loop.create_unix_server(lambda: SpectatorProtocol(self), path)
+        else:
+            server = await loop.create_server(lambda: SpectatorProtocol(self), host, port)
+        async with server:
+            await self.run()
+
+
+class SpectatorClient:
+    # Blocking-socket client for a render loop: poll() reads whatever has
+    # arrived without waiting, decodes it and acks the newest tick
+    def __init__(self, game=0, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        if path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(CLIENT_MESSAGE.pack(CLIENT_HELLO, game))
+        self.sock.setblocking(False)
+        self.buffer = bytearray()
+        self.states = {}
+        self.tick = None
+        self.state = None
+        self.connected = True
+
+    def poll(self):
+        # Returns True if a new state arrived
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.connected = False
+                break
+            self.buffer += data
+        received = False
+        while len(self.buffer) >= LENGTH.size:
+            size, = LENGTH.unpack_from(self.buffer)
+            if len(self.buffer) < LENGTH.size + size:
+                break
+            frame = bytes(self.buffer[LENGTH.size:LENGTH.size + size])
+            del self.buffer[:LENGTH.size + size]
+            kind, tick, base_tick, _ = FRAME_HEADER.unpack_from(frame)
+            if kind == FRAME_DELTA and base_tick not in self.states:
+                continue
+            self.tick, self.state = decode(frame, self.states)
+            self.states[tick] = self.state
+            # The server only encodes against acked ticks, which only move forward
+            if kind == FRAME_DELTA:
+                for old in [old for old in self.states if old < base_tick]:
+                    del self.states[old]
+            received = True
+        if received:
+            try:
+                self.sock.send(CLIENT_MESSAGE.pack(CLIENT_ACK, self.tick))
+            except BlockingIOError:
+                pass
+        return received
+
+    def close(self):
+        self.sock.close()
+
+
+def watch(game=0, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+    # Draw a served game in the game window with the regular draw code
+    import pygame
+    import main
+    from session import PLAYING, GAME_OVER
+
+    client = SpectatorClient(game, host, port, path)
+    main.bootstrap()
+    engine = Engine(screen=main.screen)
+    while client.connected:
+        main.clock.tick(SIM_RATE)
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+        if client.poll():
+            apply(client.state, engine)
+            main.draw_frame(engine, GAME_OVER if engine.game_over else PLAYING)
+    client.close()
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve games to spectators, or watch one')
+    commands = parser.add_subparsers(dest='command', required=True)
+    parser_serve = commands.add_parser('serve')
+    parser_serve.add_argument('--replays', nargs='*', default=[], help='replay files, played in a loop')
+    parser_serve.add_argument('--genome', help='evolve.py champion or checkpoint flying policy games')
+    parser_serve.add_argument('--games', type=int, default=1, help='policy games to serve with --genome')
+    parser_serve.add_argument('--seed', type=int, default=0)
+    parser_watch = commands.add_parser('watch')
+    parser_watch.add_argument('--game', type=int, default=0)
+    for command in (parser_serve, parser_watch):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=DEFAULT_PORT)
+        command.add_argument('--unix', help='Unix socket path instead of TCP')
+    args = parser.parse_args(argv)
+
+    if args.command == 'watch':
+        watch(args.game, args.host, args.port, args.unix)
+        return 0
+    feeds = []
+    if args.replays:
+        feeds.append(ReplayFeed([Replay.load(path) for path in args.replays]))
+    if args.genome:
+        from evolve import genome_policy
+        policy = genome_policy(args.genome)
+        feeds.extend(PolicyFeed(policy, args.seed + game * 1000003) for game in range(args.games))
+    if not feeds:
+        parser.error('nothing to serve: give --replays and/or --genome')
+    server = SpectatorServer(feeds)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())